@@ -0,0 +1,126 @@
+import asyncio
+
+from typing import AsyncIterator, Iterable, Optional, Tuple
+
+import can
+
+from can_sdk.capture import CaptureWriter
+from can_sdk.client import CANBusReader, Connection, _Client
+from can_sdk.codec import Number
+from can_sdk.config import SignalRegistry
+from can_sdk.dispatch import Callback, Subscription
+from can_sdk.storage import LatestValues, SignalValue
+from can_sdk.timeseries import TimeSeriesStore
+from can_sdk.transport import TransportMessage, TransportReassembler
+
+
+class _FrameListener(can.Listener):
+    def __init__(self, reader: CANBusReader) -> None:
+        self.reader = reader
+
+    def on_message_received(self, msg: can.Message) -> None:
+        self.reader._handle_frame(msg.arbitration_id, msg.timestamp, msg.data, msg.is_extended_id)
+
+
+class AsyncCANBusReader(CANBusReader):
+    """
+    CANBusReader driven by a python-can Notifier bound to the event loop instead of its own thread.
+    Frames are decoded and dispatched to subscribers in the event loop thread.
+    """
+    def __init__(self, bus, loop: asyncio.AbstractEventLoop, depth: int = 100, max_age: Optional[float] = None,
+                 registry: Optional[SignalRegistry] = None, capture: Optional[CaptureWriter] = None,
+                 timeseries: Optional[TimeSeriesStore] = None, latest: Optional[LatestValues] = None,
+                 transport: Optional[TransportReassembler] = None):
+        super().__init__(bus, depth, max_age, registry, capture, timeseries, latest, transport)
+        self.loop = loop
+        self.notifier = None
+
+    def start(self):
+        """Starts receiving messages in the event loop."""
+        self.running = True
+        self.notifier = can.Notifier(self.bus, [_FrameListener(self)], loop=self.loop)
+
+    def stop(self):
+        """Stops receiving messages."""
+        self.running = False
+        if self.notifier is not None:
+            self.notifier.stop()
+            self.notifier = None
+
+
+class AsyncConnection(Connection):
+    """
+    asyncio counterpart of can_sdk.client.Connection (same options except offload), use with `async with`
+    """
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        if self.settings.offload:
+            raise ValueError("offload is not available for AsyncConnection, frames are decoded in the event loop")
+
+    def _reader(self) -> AsyncCANBusReader:
+        settings = self.settings
+        return AsyncCANBusReader(self._bus, asyncio.get_running_loop(), settings.history_depth, settings.history_age,
+                                 self._registry, self.capture, self.timeseries, self.latest, self._transport())
+
+    async def __aenter__(self) -> '_AsyncClient':
+        self._open()
+        return _AsyncClient(_Client(self._bus, self.reader, self.task_manager, self._registry))
+
+    async def __aexit__(self, exc_type, exc_value, traceback) -> None:
+        self._close()
+
+
+class _AsyncClient:
+    """
+    Async client wrapper, shares the config, codec and latest value table with the synchronous client
+    """
+    def __init__(self, client: _Client) -> None:
+        self._client = client
+
+    async def read(self, index: int) -> Optional[Number]:
+        """
+        Returns the last received physical value for given index
+        """
+        return self._client.read(index)
+
+    async def read_latest(self, index: int) -> Optional[SignalValue]:
+        return self._client.read_latest(index)
+
+    async def read_message(self, pgn: int, source_address: Optional[int] = None) -> Optional[TransportMessage]:
+        """
+        See _Client.read_message
+        """
+        return self._client.read_message(pgn, source_address)
+
+    async def write(self, index: int, value: int) -> bool:
+        """
+        Writes a value to the given index
+        """
+        return self._client.write(index, value)
+
+    def subscribe(self, signal_ids: Iterable[int], callback: Callback,
+                  min_interval: Optional[float] = None, on_change_only: bool = False) -> Subscription:
+        """
+        See _Client.subscribe, callbacks run in the event loop thread
+        """
+        return self._client.subscribe(signal_ids, callback, min_interval, on_change_only)
+
+    async def stream(self, signal_ids: Iterable[int], min_interval: Optional[float] = None,
+                     on_change_only: bool = False, maxsize: int = 1000) -> AsyncIterator[Tuple[int, SignalValue]]:
+        """
+        Yields (signal_id, SignalValue) for every received value of the signals.
+        When the consumer falls behind by more than maxsize values the oldest ones are dropped.
+        """
+        queue: asyncio.Queue = asyncio.Queue(maxsize)
+
+        def enqueue(signal_id: int, value: SignalValue) -> None:
+            if queue.full():
+                queue.get_nowait()
+            queue.put_nowait((signal_id, value))
+
+        subscription = self.subscribe(signal_ids, enqueue, min_interval, on_change_only)
+        try:
+            while True:
+                yield await queue.get()
+        finally:
+            subscription.cancel()
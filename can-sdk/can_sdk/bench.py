@@ -0,0 +1,271 @@
+"""
+Micro benchmarks of the SDK hot paths, run with `python -m can_sdk.bench` from a directory containing config_system.json
+"""
+import argparse
+import timeit
+
+from can_sdk.config import load_registry
+
+
+def _best(stmt: str, number: int, **names) -> float:
+    """Best time of one execution of stmt in microseconds"""
+    return min(timeit.repeat(stmt, number=number, repeat=5, globals=names)) / number * 1e6
+
+
+def _best_interleaved(stmts: dict, number: int, rounds: int = 20, **names) -> dict:
+    """
+    Best time in microseconds of one execution of each statement ({label: stmt}),
+    measured in alternating rounds so that they are compared under the same load
+    """
+    best = dict.fromkeys(stmts, float('inf'))
+    for _ in range(rounds):
+        for label, stmt in stmts.items():
+            best[label] = min(best[label], timeit.timeit(stmt, number=number, globals=names) / number * 1e6)
+    return best
+
+
+def bench_codec(number: int = 20000) -> None:
+    """Encoding of every configured frame with the legacy compute_frame_values vs. the compiled codec"""
+    import random
+    from can_sdk.client import compute_frame_values
+
+    registry = load_registry()
+    rng = random.Random(0)
+    print(f"{'frame':>8} {'signals':>8} {'legacy us':>10} {'codec us':>10} {'speedup':>8} {'decode us':>10}")
+    for pgn in registry.pgns():
+        frame = registry.frame(pgn)
+        values = [s.value for s in frame.signals]
+        # both sides encode the same values into a frame word, nothing else (the identifier is not part of it)
+        raw_vals = [s.codec.to_physical(rng.randrange(s.codec.mask + 1)) for s in frame.signals]
+        data = frame.encode(raw_vals).to_bytes(8, 'big')
+        best = _best_interleaved(
+            {
+                'legacy': "compute_frame_values(values, raw_vals)",
+                'codec': "encode(raw_vals)",
+                'decode': "decode(data)",
+            },
+            number, compute_frame_values=compute_frame_values, values=values, raw_vals=raw_vals,
+            encode=frame.encode, decode=frame.decode, data=data,
+        )
+        print(f"{pgn:>#8x} {len(values):>8} {best['legacy']:>10.3f} {best['codec']:>10.3f} "
+              f"{best['legacy'] / best['codec']:>7.1f}x {best['decode']:>10.3f}")
+
+
+def bench_bulk(count: int = 1000000) -> None:
+    """Vectorized decoding of captured frames vs. decoding them one by one with the codec"""
+    import time
+    import numpy as np
+    from can_sdk.bulk import decode_frames
+
+    registry = load_registry()
+    rng = np.random.default_rng(0)
+    known = np.array([s.arbitration_id for s in registry], dtype=np.uint32)
+    ids = known[rng.integers(0, len(known), count)]
+    timestamps = np.arange(count, dtype=np.float64) / 2000
+    payloads = rng.integers(0, 256, (count, 8), dtype=np.uint8)
+
+    start = time.perf_counter()
+    decode_frames(ids, timestamps, payloads, registry)
+    t_bulk = time.perf_counter() - start
+
+    sample = 20000
+    start = time.perf_counter()
+    for arbitration_id, data in zip(ids[:sample].tolist(), map(bytes, payloads[:sample])):
+        registry.frame_for(arbitration_id).decode(data)
+    t_loop = (time.perf_counter() - start) / sample * count
+
+    print(f"{count} frames: bulk {t_bulk:.3f} s, per-frame codec {t_loop:.3f} s (extrapolated), {t_loop / t_bulk:.1f}x")
+
+
+def _tx_gaps(rx_bus, arbitration_id: int, duration: float, action=None, rate: float = 100) -> list:
+    """Receives frames with the ID for duration seconds (calling action at rate Hz meanwhile), returns inter-frame gaps"""
+    import time
+
+    stamps = []
+    start = next_action = time.perf_counter()
+    n = 0
+    while time.perf_counter() - start < duration:
+        if action is not None and time.perf_counter() >= next_action:
+            action(n)
+            n += 1
+            next_action += 1 / rate
+        msg = rx_bus.recv(0.001)
+        if msg is not None and msg.arbitration_id == arbitration_id:
+            stamps.append(msg.timestamp)
+    return [b - a for a, b in zip(stamps, stamps[1:])]
+
+
+def bench_tx_update(duration: float = 3.0) -> None:
+    """Writes TSC1 (10 ms period) at 100 Hz over the virtual bus and checks the periodic stream for skipped cycles"""
+    import can
+    from can_sdk.client import Connection
+
+    connection = Connection('virtual', 'bench_tx_update', 250000)
+    with connection as client, can.Bus(interface='virtual', channel='bench_tx_update') as rx_bus:
+        signal = connection._registry[5]
+        period = signal.period / 1000
+        gaps = _tx_gaps(rx_bus, signal.arbitration_id, duration, lambda n: client.write(signal.id, 1000 + n % 500))
+        skipped = sum(round(gap / period) - 1 for gap in gaps if gap > 1.5 * period)
+        print(f"frames {len(gaps) + 1} (expected ~{duration / period:.0f}), "
+              f"max gap {max(gaps) * 1000:.2f} ms, skipped cycles {skipped}, task manager {connection.task_manager.stats}")
+
+
+def bench_scheduler(duration: float = 3.0) -> None:
+    """Runs the configured frames from the TransmitScheduler over the virtual bus and prints per-frame jitter"""
+    import time
+    from can_sdk.client import Connection
+
+    connection = Connection('virtual', 'bench_scheduler', 250000)
+    with connection:
+        time.sleep(duration)
+        stats = connection.scheduler.stats()
+    print(f"{'id':>10} {'period ms':>10} {'phase ms':>9} {'sent':>6} {'skipped':>8} {'jitter mean ms':>15} {'jitter max ms':>14}")
+    for arbitration_id, s in stats.items():
+        print(f"{arbitration_id:>#10x} {s['period'] * 1000:>10.0f} {s['phase'] * 1000:>9.1f} {s['sent']:>6} {s['skipped']:>8} "
+              f"{s['jitter_mean'] * 1000:>15.3f} {s['jitter_max'] * 1000:>14.3f}")
+
+
+def bench_write(count: int = 200) -> None:
+    """Cost of write() of TSC1 and latency until the frame with the new value is received on the virtual bus"""
+    import itertools
+    import random
+    import statistics
+    import time
+    import can
+    from can_sdk.client import Connection
+
+    connection = Connection('virtual', 'bench_write', 250000)
+    with connection as client, can.Bus(interface='virtual', channel='bench_write') as rx_bus:
+        signal = connection._registry[5]
+        period = signal.period / 1000
+        writers = {
+            'client.write': lambda v: client.write(signal.id, v),
+            'writer': client.writer(signal.id),
+            'writer immediate': client.writer(signal.id, immediate=True),
+        }
+        print(f"{'path':>18} {'call us':>8} {'latency mean ms':>16} {'p99 ms':>8} {'max ms':>8}")
+        for run, (name, write) in enumerate(writers.items()):
+            values = itertools.cycle([1000, 1100])
+            call = _best("write(next(values))", 2000, write=write, values=values)
+
+            latencies = []
+            for n in range(count):
+                raw = signal.codec.to_raw(1000) + run * count + n  # distinct value for every write
+                value = signal.codec.to_physical(raw)
+                time.sleep(random.random() * period)  # write at a random point of the transmission cycle
+                while rx_bus.recv(0) is not None:
+                    pass
+                start = time.time()
+                write(value)
+                while True:
+                    msg = rx_bus.recv(1.0)
+                    if msg.arbitration_id == signal.arbitration_id and \
+                            signal.codec.unpack_raw(int.from_bytes(msg.data, 'big')) == raw:
+                        break
+                latencies.append((msg.timestamp - start) * 1000)
+            latencies.sort()
+            print(f"{name:>18} {call:>8.2f} {statistics.mean(latencies):>16.3f} "
+                  f"{latencies[int(len(latencies) * 0.99)]:>8.3f} {latencies[-1]:>8.3f}")
+
+
+def bench_replay(count: int = 500000) -> None:
+    """Writes a synthetic capture and replays it through CANBusReader and through bulk decoding at max speed"""
+    import os
+    import tempfile
+    import time
+    from can_sdk.capture import CaptureReplay, CaptureWriter
+    from can_sdk.client import CANBusReader
+
+    registry = load_registry()
+    ids = [s.arbitration_id | 3 for s in registry]
+    path = os.path.join(tempfile.mkdtemp(), 'bench.cap')
+    with CaptureWriter(path) as capture:
+        for n in range(count):
+            capture.write(n / 2000, ids[n % len(ids)], (n & 0xffffffffffffffff).to_bytes(8, 'little'))
+
+    hour = 2000 * 3600  # frames of one hour at ~2000 frames/s
+    with CaptureReplay(path) as replay:
+        reader = CANBusReader(None, registry=registry)
+        start = time.perf_counter()
+        replay.feed(reader)
+        t_feed = time.perf_counter() - start
+        print(f"pipeline: {count} frames in {t_feed:.2f} s, {count / t_feed:.0f} frames/s, one hour ~{t_feed / count * hour:.0f} s")
+
+        try:
+            from can_sdk.bulk import decode_frames
+        except ImportError:
+            return
+        start = time.perf_counter()
+        ids, timestamps, payloads, extended = replay.arrays()
+        decode_frames(ids, timestamps, payloads, registry, extended)
+        t_bulk = time.perf_counter() - start
+        del ids, timestamps, payloads, extended  # views of the mapped file, released before it is closed
+        print(f"bulk: {count} frames in {t_bulk:.2f} s, one hour ~{t_bulk / count * hour:.1f} s")
+    os.remove(path)
+
+
+def bench_offload(count: int = 200000) -> None:
+    """Per-frame cost of the receiving thread when decoding in the thread and when offloading to the worker"""
+    from can_sdk.client import CANBusReader
+    from can_sdk.offload import OffloadCANBusReader
+
+    registry = load_registry()
+    arbitration_id = registry.signals[0].arbitration_id
+    data = bytes(8)
+    reader = CANBusReader(None, registry=registry)
+    offload = OffloadCANBusReader(None, registry, capacity=1 << 16)
+    try:
+        for name, r in (('decode in thread', reader), ('offload', offload)):
+            t = _best("handle(arbitration_id, 1.0, data)", count,
+                      handle=r._handle_frame, arbitration_id=arbitration_id, data=data)
+            print(f"{name:>18}: {t:.2f} us/frame")
+    finally:
+        offload.latest.close()
+        offload.ring.close()
+
+
+def bench_transport(count: int = 200) -> None:
+    """Reassembly of maximum size BAM transfers (255 data packets) of a configured PGN through the reader"""
+    from can_sdk.client import CANBusReader
+    from can_sdk.transport import BAM, MAX_PACKET_SIZE, TP_CM, TP_DT, TransportReassembler
+
+    registry = load_registry()
+    pgn = next(iter(registry.pgns()))
+    frames = [(7 << 26 | TP_CM << 8 | 0xff00,
+               bytes((BAM, MAX_PACKET_SIZE & 0xff, MAX_PACKET_SIZE >> 8, 255, 0xff)) + pgn.to_bytes(3, 'little'))]
+    frames += [(7 << 26 | TP_DT << 8 | 0xff00, bytes((seq,)) + bytes(7)) for seq in range(1, 256)]
+    reader = CANBusReader(None, registry=registry, transport=TransportReassembler(registry.pgns()))
+    ignored = CANBusReader(None, registry=registry, transport=TransportReassembler(()))
+
+    def transfer(handle):
+        for arbitration_id, data in frames:
+            handle(arbitration_id, 1.0, data)
+
+    for name, r in (('reassembled', reader), ('ignored PGN', ignored)):
+        t = _best("transfer(handle)", count, transfer=transfer, handle=r._handle_frame) / len(frames)
+        print(f"{name:>18}: {t:.2f} us/frame")
+
+
+BENCHMARKS = {
+    'codec': bench_codec,
+    'bulk': bench_bulk,
+    'tx_update': bench_tx_update,
+    'scheduler': bench_scheduler,
+    'write': bench_write,
+    'replay': bench_replay,
+    'offload': bench_offload,
+    'transport': bench_transport,
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('names', nargs='*', choices=[[], *BENCHMARKS], help="benchmarks to run (default: all)")
+    args = parser.parse_args()
+    for name in args.names or BENCHMARKS:
+        print(f"== {name}")
+        BENCHMARKS[name]()
+
+
+if __name__ == '__main__':
+    main()
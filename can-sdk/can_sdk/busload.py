@@ -0,0 +1,117 @@
+import math
+
+from typing import Dict, Hashable, List, Optional, Tuple
+
+
+class BusLoadError(Exception):
+    """Raised when scheduling a frame would exceed the allowed bus load"""
+
+
+def frame_bits(dlc: int = 8, extended: bool = True, stuffing: str = 'worst') -> int:
+    """
+    Number of bits a data frame occupies on the bus including the interframe space.
+    stuffing: 'worst' (one stuff bit per 4 bits of the stuffable part), 'typical' (one per 10 bits) or 'none'
+    """
+    # SOF, arbitration field, control field, data and CRC are subject to bit stuffing
+    stuffable = 1 + (32 if extended else 12) + 6 + 8 * dlc + 15
+    # CRC delimiter, ACK slot + delimiter, EOF, interframe space
+    fixed = 1 + 2 + 7 + 3
+    if stuffing == 'worst':
+        stuff = (stuffable - 1) // 4
+    elif stuffing == 'typical':
+        stuff = stuffable // 10
+    elif stuffing == 'none':
+        stuff = 0
+    else:
+        raise ValueError(f"Unknown stuffing estimate {stuffing!r}")
+    return stuffable + fixed + stuff
+
+
+def _check_period(period_ms: int) -> None:
+    if period_ms <= 0:
+        raise ValueError(f"Period of a periodic frame must be positive, got {period_ms} ms")
+
+
+class BusLoadPlanner:
+    """
+    Keeps track of the periodic frames sent on a bus to compute the expected load and to choose phase offsets.
+    Bits are accumulated into windows of window_ms over one hyperperiod (least common multiple of the periods,
+    capped at max_horizon_ms), the phase of a new frame is chosen to minimize the peak window load.
+    """
+    def __init__(self, bitrate: int, window_ms: int = 1, max_horizon_ms: int = 60000, stuffing: str = 'worst') -> None:
+        self.bitrate = bitrate
+        self.window_ms = window_ms
+        self.max_horizon_ms = max_horizon_ms
+        self.stuffing = stuffing
+
+        self.frames: Dict[Hashable, Tuple[int, int, int]] = {}  # {key: (period_ms, bits, phase_ms)}
+        self._horizon = window_ms
+        self._windows: List[int] = [0]  # bits sent in each window of the horizon
+
+    def bits_per_second(self) -> float:
+        return sum(bits * 1000 / period for period, bits, _ in self.frames.values())
+
+    def load(self, extra: Optional[Tuple[int, int]] = None) -> float:
+        """
+        Average bus load as a fraction of the bitrate, optionally with an extra frame (period_ms, dlc) added
+        """
+        bps = self.bits_per_second()
+        if extra is not None:
+            period, dlc = extra
+            _check_period(period)
+            bps += frame_bits(dlc, stuffing=self.stuffing) * 1000 / period
+        return bps / self.bitrate
+
+    def peak(self) -> float:
+        """Highest load of a single window as a fraction of its capacity"""
+        return max(self._windows) / (self.bitrate * self.window_ms / 1000)
+
+    def add(self, key: Hashable, period_ms: int, dlc: int = 8, phase_ms: Optional[int] = None) -> int:
+        """
+        Registers a periodic frame, returns its phase in milliseconds (the least loaded one unless given)
+        """
+        _check_period(period_ms)
+        self.remove(key)
+        bits = frame_bits(dlc, stuffing=self.stuffing)
+        self._resize(self._horizon_for(period_ms))
+
+        if phase_ms is None:
+            phase_ms = self._best_phase(period_ms, bits)
+        self.frames[key] = (period_ms, bits, phase_ms)
+        self._accumulate(period_ms, bits, phase_ms, 1)
+        return phase_ms
+
+    def remove(self, key: Hashable) -> None:
+        entry = self.frames.pop(key, None)
+        if entry is not None:
+            self._accumulate(*entry, -1)
+
+    def _horizon_for(self, period_ms: int) -> int:
+        horizon = self._horizon
+        for period in (period_ms, self.window_ms):
+            horizon = horizon * period // math.gcd(horizon, period)
+        return min(horizon, self.max_horizon_ms)
+
+    def _resize(self, horizon: int) -> None:
+        if horizon == self._horizon:
+            return
+        self._horizon = horizon
+        self._windows = [0] * max(1, horizon // self.window_ms)
+        for entry in self.frames.values():
+            self._accumulate(*entry, 1)
+
+    def _slots(self, period_ms: int, phase_ms: int):
+        for t in range(phase_ms, self._horizon, period_ms):
+            yield (t // self.window_ms) % len(self._windows)
+
+    def _accumulate(self, period_ms: int, bits: int, phase_ms: int, sign: int) -> None:
+        for slot in self._slots(period_ms, phase_ms):
+            self._windows[slot] += sign * bits
+
+    def _best_phase(self, period_ms: int, bits: int) -> int:
+        best_phase, best_peak = 0, None
+        for phase in range(0, min(period_ms, self._horizon), self.window_ms):
+            peak = max(self._windows[slot] for slot in self._slots(period_ms, phase)) + bits
+            if best_peak is None or peak < best_peak:
+                best_phase, best_peak = phase, peak
+        return best_phase
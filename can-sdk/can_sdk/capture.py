@@ -0,0 +1,125 @@
+"""
+Compact binary capture of received frames.
+A capture is a 16 byte header followed by fixed 24 byte records: timestamp (float64), identifier (uint32, bit 31 set
+for extended identifiers), dlc (uint8), 3 padding bytes and 8 payload bytes, all little-endian.
+"""
+import mmap
+import struct
+import time
+
+from typing import BinaryIO, Iterator, Optional, Tuple
+
+MAGIC = b'CANSDKC1'
+HEADER = struct.Struct('<8sII')  # magic, record size, reserved
+RECORD = struct.Struct('<dIB3x8s')
+EXTENDED_FLAG = 0x80000000
+
+Frame = Tuple[float, int, int, bytes, bool]  # (timestamp, arbitration_id, dlc, data, is_extended_id)
+
+
+class CaptureWriter:
+    """
+    Appends frames to a capture file, used by CANBusReader to tee everything it receives
+    """
+    def __init__(self, path: str, buffering: int = 1 << 16) -> None:
+        self.path = path
+        self._file: BinaryIO = open(path, 'ab', buffering=buffering)
+        if self._file.tell() == 0:
+            self._file.write(HEADER.pack(MAGIC, RECORD.size, 0))
+        self._pack = RECORD.pack
+        self.count = 0
+
+    def write(self, timestamp: float, arbitration_id: int, data: bytes, is_extended_id: bool = True) -> None:
+        dlc = len(data)
+        if dlc != 8:
+            data = bytes(data[:8]).ljust(8, b'\xff')
+        self._file.write(self._pack(timestamp, arbitration_id | EXTENDED_FLAG if is_extended_id else arbitration_id, dlc, data))
+        self.count += 1
+
+    def flush(self) -> None:
+        self._file.flush()
+
+    def close(self) -> None:
+        self._file.close()
+
+    def __enter__(self) -> 'CaptureWriter':
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
+
+
+class CaptureReplay:
+    """
+    Memory-mapped capture file, iterates over frames without reading the file into memory
+    """
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._file = open(path, 'rb')
+        self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, record_size, _ = HEADER.unpack_from(self._mmap, 0)
+        if magic != MAGIC or record_size != RECORD.size:
+            raise ValueError(f"{path} is not a can_sdk capture")
+        # a capture cut short while recording may end with a partial record, ignore it
+        self._end = HEADER.size + (len(self._mmap) - HEADER.size) // RECORD.size * RECORD.size
+        self._view = memoryview(self._mmap)[HEADER.size:self._end]
+
+    def __len__(self) -> int:
+        return len(self._view) // RECORD.size
+
+    def __iter__(self) -> Iterator[Frame]:
+        for timestamp, identifier, dlc, data in RECORD.iter_unpack(self._view):
+            yield timestamp, identifier & ~EXTENDED_FLAG, dlc, data[:dlc], bool(identifier & EXTENDED_FLAG)
+
+    def arrays(self):
+        """
+        Returns (arbitration_ids, timestamps, payloads, extended) numpy arrays for can_sdk.bulk.decode_frames,
+        extended is the mask of the frames with 29-bit identifiers.
+        timestamps and payloads are views of the mapped file without a copy: while they (or arrays derived from them
+        without copying) are alive the file stays mapped, close() then only closes the file and the mapping is
+        released once the last view is garbage collected.
+        """
+        import numpy as np
+
+        records = np.frombuffer(self._view, dtype=np.dtype([
+            ('timestamp', '<f8'), ('identifier', '<u4'), ('dlc', 'u1'), ('pad', 'V3'), ('data', 'u1', 8),
+        ]))
+        identifiers = records['identifier']
+        return (identifiers & ~np.uint32(EXTENDED_FLAG), records['timestamp'], records['data'],
+                (identifiers & np.uint32(EXTENDED_FLAG)) != 0)
+
+    def feed(self, reader, speed: Optional[float] = None) -> int:
+        """
+        Passes the frames through the reader's decode/storage pipeline (CANBusReader._handle_frame).
+        speed: None replays as fast as possible, 1.0 in real time, 2.0 twice as fast etc.
+        Returns the number of frames fed.
+        """
+        handle = reader._handle_frame
+        count = 0
+        start_wall = start_ts = None
+        for timestamp, arbitration_id, dlc, data, is_extended_id in self:
+            if speed is not None:
+                if start_ts is None:
+                    start_wall, start_ts = time.perf_counter(), timestamp
+                delay = (timestamp - start_ts) / speed - (time.perf_counter() - start_wall)
+                if delay > 0:
+                    time.sleep(delay)
+            handle(arbitration_id, timestamp, data, is_extended_id)
+            count += 1
+        return count
+
+    def close(self) -> None:
+        try:
+            self._view.release()
+            self._mmap.close()
+        except BufferError:
+            # arrays() views are still in use, the mapping is released together with the last of them
+            pass
+        self._file.close()
+
+    def __enter__(self) -> 'CaptureReplay':
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
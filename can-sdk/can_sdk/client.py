@@ -1,47 +1,158 @@
 import logging
+import struct
 import time
 import can
 
 from enum import Enum
-from typing import TypedDict, List, Optional, Union
-from typing_extensions import Unpack
+from typing import TypedDict, Iterable, List, NamedTuple, Optional, Union
 
 from multiprocessing import Process
 
 import threading
 
-from can_sdk.config import FrameValue, PrepareFrameParams, FrameValueKind, read as read_config
+from can_sdk.codec import FRAME_MASK, Number
+from can_sdk.config import FrameValue, FrameValueKind, CompiledSignal, SignalRegistry, pgn_of, load_registry
+from can_sdk.dispatch import Callback, Dispatcher, Subscription
+from can_sdk.busload import BusLoadError, BusLoadPlanner
+from can_sdk.capture import CaptureWriter
+from can_sdk.filters import can_filters
+from can_sdk.scheduler import TransmitScheduler
+from can_sdk.storage import LatestValues, MessageRing, SignalValue
+from can_sdk.timeseries import TimeSeriesStore
+from can_sdk.transport import TP_CM, TP_DT, TRANSPORT_PGNS, TransportMessage, TransportReassembler
 
 logger = logging.getLogger('sdk')
 logging.basicConfig(level=logging.INFO)
 
+class ConnectionSettings(NamedTuple):
+    """
+    Optional features of a Connection, every field can also be given to Connection as a keyword argument.
+
+    history_depth, history_age: raw frames kept per arbitration ID (see MessageRing)
+    hardware_filters: only accept frames of the configured PGNs (installed as acceptance filters on the bus)
+    merge_filters: merge the filters into a minimal set of id/mask pairs
+    max_filters: widen the filters until at most this many remain (for controllers with few filter banks)
+    scheduler: send all periodic frames from one TransmitScheduler thread instead of bus.send_periodic tasks
+    max_bus_load: highest allowed average bus load of the periodic frames (fraction of the bitrate)
+    on_overload: 'warn' or 'reject' frames that would exceed max_bus_load (see SendingTaskManager)
+    record: path of a capture file every received frame is appended to (see can_sdk.capture)
+    offload: decode in a worker process, the reader thread only copies frames to shared memory (see can_sdk.offload)
+    transport: reassemble messages of the configured PGNs sent with the J1939 transport protocol (see can_sdk.transport)
+    address: own source address, connection mode transfers to it are answered (not available with offload)
+    """
+    history_depth: int = 100
+    history_age: Optional[float] = None
+    hardware_filters: bool = True
+    merge_filters: bool = False
+    max_filters: Optional[int] = None
+    scheduler: bool = True
+    max_bus_load: float = 1.0
+    on_overload: str = 'warn'
+    record: Optional[str] = None
+    offload: bool = False
+    transport: bool = True
+    address: Optional[int] = None
+
+
 class Connection:
     """
     Connection class that handles the connection to the CAN bus and provides a client to interact with it
     """
-    def __init__(self, interface: str, channel: Union[str,int], bitrate: int) -> None:
+    def __init__(self, interface: str, channel: Union[str,int], bitrate: int,
+                 settings: Optional[ConnectionSettings] = None, registry: Optional[SignalRegistry] = None,
+                 latest: Optional[LatestValues] = None, timeseries: Optional[TimeSeriesStore] = None,
+                 **options) -> None:
+        """
+        settings: optional features (see ConnectionSettings), single fields can be overridden by keyword arguments,
+                  e.g. Connection('pcan', 'PCAN_USBBUS1', 250000, record='bus.capture')
+        registry: signals sent and received on this bus (default: the whole configuration)
+        latest: latest value table to decode into, e.g. shared with other connections (see can_sdk.multi)
+        timeseries: store the history of every decoded signal is recorded into (see can_sdk.timeseries)
+        """
+        settings = settings if settings is not None else ConnectionSettings()
+        self.settings = settings._replace(**options) if options else settings
+        if self.settings.offload and (timeseries is not None or latest is not None or self.settings.address is not None):
+            raise ValueError("timeseries, latest and address are not available when decoding is offloaded")
         self.interface = interface
         self.channel = channel
         self.bitrate = bitrate
+        self.timeseries = timeseries
+        self.latest = latest
 
-        self._config = read_config()
+        self._registry = registry if registry is not None else load_registry()
+        self._bus = self.scheduler = self.task_manager = self.capture = self.reader = None
 
 
-    def __enter__(self):
-        self._bus = can.Bus(interface=self.interface, channel=self.channel, bitrate=self.bitrate)
-
-        self.task_manager = SendingTaskManager(self._bus)
-        self.task_manager.update_tasks((v, 0) for v in self._config)
-
-        self.reader = CANBusReader(self._bus)
-        self.reader.start()
+    def filters(self) -> Optional[List[dict]]:
+        """
+        Acceptance filters installed on the bus, None when all frames are received
+        """
+        settings = self.settings
+        if not settings.hardware_filters:
+            return None
+        return can_filters(self._registry, settings.merge_filters, settings.max_filters,
+                           TRANSPORT_PGNS if settings.transport else ())
 
-        return _Client(self._bus, self.reader, self.task_manager)
+    def __enter__(self):
+        self._open()
+        return _Client(self._bus, self.reader, self.task_manager, self._registry)
 
     def __exit__(self, exc_type, exc_value, traceback) -> None:
-        self.task_manager.stop_all()
-        self.reader.stop()
-        self._bus.shutdown()
+        self._close()
+
+    def _transport(self) -> Optional[TransportReassembler]:
+        """Transport protocol reassembler of the reader, None when disabled"""
+        if not self.settings.transport:
+            return None
+        return TransportReassembler(self._registry.pgns(), self.settings.address, self._bus.send)
+
+    def _reader(self) -> 'CANBusReader':
+        """Reader of the opened bus, not started yet"""
+        settings = self.settings
+        if settings.offload:
+            from can_sdk.offload import OffloadCANBusReader
+            return OffloadCANBusReader(self._bus, self._registry, self.capture, transport=settings.transport)
+        return CANBusReader(self._bus, settings.history_depth, settings.history_age, self._registry,
+                            self.capture, self.timeseries, self.latest, self._transport())
+
+    def _open(self) -> None:
+        """
+        Opens the bus, starts sending the configured frames and starts the reader.
+        When a step fails, everything started before it is stopped again.
+        """
+        settings = self.settings
+        self._bus = self.scheduler = self.task_manager = self.capture = self.reader = None
+        try:
+            self._bus = can.Bus(interface=self.interface, channel=self.channel, bitrate=self.bitrate,
+                                can_filters=self.filters())
+            self.capture = CaptureWriter(settings.record) if settings.record else None
+
+            self.scheduler = TransmitScheduler(self._bus) if settings.scheduler else None
+            if self.scheduler is not None:
+                self.scheduler.start()
+            self.task_manager = SendingTaskManager(self._bus, self.scheduler, self.bitrate, settings.max_bus_load,
+                                                   settings.on_overload)
+            self.task_manager.update_tasks((s, 0) for s in self._registry)
+
+            reader = self._reader()
+            reader.start()
+            self.reader = reader
+        except BaseException:
+            self._close()
+            raise
+
+    def _close(self) -> None:
+        """Stops whatever _open started, in reverse order"""
+        if self.reader is not None:
+            self.reader.stop()
+        if self.task_manager is not None:
+            self.task_manager.stop_all()
+        if self.scheduler is not None:
+            self.scheduler.stop()
+        if self.capture is not None:
+            self.capture.close()
+        if self._bus is not None:
+            self._bus.shutdown()
 
     def options():
         """
@@ -56,13 +167,14 @@ class Connection:
         ]
 
 
-def prepare_frame(**kwargs: Unpack[PrepareFrameParams]) -> int:
-    return (kwargs['priority'] << 26) | (kwargs.pop('data_page', 0) << 25) | (kwargs['pgn'] << 8) | kwargs.pop('source_addr', 0)
-
 def compute_frame_value(v: FrameValue, raw_value: int) -> int:
     return int((raw_value - v['offset'] ) / v['factor'] * (10 ** v['dec']))
 
 def compute_frame_values(vals: List[FrameValue], raw_vals: Optional[int]) -> int:
+    """
+    Encodes the values into a frame word directly from their definitions.
+    Kept for compatibility, the SDK itself uses the precompiled plans from can_sdk.codec.
+    """
     base = 0xffffffffffffffff
 
     def to_little_endian(value: int, num_bits: int) -> int:
@@ -103,80 +215,207 @@ def compute_frame_values(vals: List[FrameValue], raw_vals: Optional[int]) -> int
 
     return base
 
+class PeriodicFrame:
+    """
+    Outgoing frame shared by all signals with the same arbitration ID, holding its current payload word
+    and one preallocated message whose data is updated in place.
+    The frame is sent with the shortest period of its signals.
+    """
+    __slots__ = ('arbitration_id', 'period', 'word', 'values', 'task', 'task_period', 'msg')
+
+    def __init__(self, arbitration_id: int, period: int) -> None:
+        self.arbitration_id = arbitration_id
+        self.period = period  # milliseconds
+        self.word = FRAME_MASK
+        self.values = {}  # {signal_id: raw_val}
+        self.task = None
+        self.task_period = None  # period the running task was started with
+        self.msg = can.Message(arbitration_id=arbitration_id, data=bytearray(8), is_extended_id=True)
+
+    def set(self, signal: CompiledSignal, raw_val) -> bool:
+        """Updates the bits of one signal, returns whether the payload changed"""
+        self.values[signal.id] = raw_val
+        word = signal.codec.pack(self.word, raw_val)
+        changed = word != self.word
+        self.word = word
+        return changed
+
+    def message(self) -> can.Message:
+        """Writes the current word into the message data and returns the message"""
+        _pack_word(self.msg.data, 0, self.word)
+        return self.msg
+
+
+_pack_word = struct.Struct('>Q').pack_into
+
+
 class SendingTaskManager:
-    def __init__(self, bus):
+    def __init__(self, bus, scheduler: Optional[TransmitScheduler] = None,
+                 bitrate: Optional[int] = None, max_load: float = 1.0, on_overload: str = 'warn'):
+        """
+        scheduler: runs the periodic frames, when not given each frame is a bus.send_periodic task
+        bitrate: enables bus load planning; with a scheduler frames are staggered to minimize the peak load per
+                 millisecond, bus.send_periodic tasks can not be given a phase, so without one only the average load
+                 is checked (and the frames are accounted as starting together)
+        max_load: highest allowed average bus load (fraction of the bitrate)
+        on_overload: 'warn' logs frames exceeding max_load, 'reject' raises BusLoadError instead of sending them
+        """
+        if on_overload not in ('warn', 'reject'):
+            raise ValueError(f"Unknown overload policy {on_overload!r}")
         self.bus = bus
-        self.active_tasks = {}  # {arbitration_id: (task, frame_info, raw_val)}
+        self.scheduler = scheduler
+        self.planner = BusLoadPlanner(bitrate) if bitrate else None
+        self.max_load = max_load
+        self.on_overload = on_overload
+        self.active_tasks = {}  # {arbitration_id: PeriodicFrame}
         self.lock = threading.Lock()
+        self.stats = {'started': 0, 'modified': 0, 'restarted': 0}
 
-    def update_or_create_task(self, es_fv, raw_val):
+    def update_or_create_task(self, signal: CompiledSignal, raw_val):
+        """Sets the value of one signal, other signals of the same frame keep their values"""
         with self.lock:
-            arbitration_id = prepare_frame(**es_fv['frame'])
-
-            if arbitration_id in self.active_tasks:
-                _, existing_es_fv, existing_raw_val = self.active_tasks[arbitration_id]
-
-                if existing_es_fv != es_fv or existing_raw_val != raw_val:
-                    # If the task exists but parameters have changed, stop the old task
-                    self.active_tasks[arbitration_id][0].stop()
-                    # Remove the old task before creating a new one
-                    del self.active_tasks[arbitration_id]
-                    # No need for an else branch to update, as stopping and recreating is required for changes
+            frame = self.active_tasks.get(signal.arbitration_id)
 
-            # If the task does not exist or was just removed, create it
-            if arbitration_id not in self.active_tasks:
-                self._create_task(es_fv, raw_val)
+            if frame is None:
+                frame = PeriodicFrame(signal.arbitration_id, signal.period)
+                frame.set(signal, raw_val)
+                self._start_task(frame)
+                self.active_tasks[signal.arbitration_id] = frame
+                return
 
+            word = signal.codec.pack(frame.word, raw_val)
+            period = min(frame.period, signal.period)
+            if word != frame.word or period != frame.period:
+                self._update_task(frame, word, period)
+            frame.values[signal.id] = raw_val
 
     def update_tasks(self, values_to_send):
+        """Sets values of signals, frames that carry none of the given signals are stopped"""
         with self.lock:
-            seen_ids = set()
-
-            for es_fv, raw_val in values_to_send:
-                arbitration_id = prepare_frame(**es_fv['frame'])
-                seen_ids.add(arbitration_id)
-
-                if arbitration_id in self.active_tasks:
-                    _, existing_frame_info, existing_raw_val = self.active_tasks[arbitration_id]
-                    if existing_frame_info != es_fv['frame'] or existing_raw_val != raw_val:
-                        # Frame info or raw value changed, recreate task
-                        self.active_tasks[arbitration_id][0].stop()
-                        self._create_task(es_fv, raw_val)
+            frames = {}
+            for signal, raw_val in values_to_send:
+                frame = frames.get(signal.arbitration_id)
+                if frame is None:
+                    frame = frames[signal.arbitration_id] = PeriodicFrame(signal.arbitration_id, signal.period)
+                frame.period = min(frame.period, signal.period)
+                frame.set(signal, raw_val)
+
+            for arbitration_id, frame in frames.items():
+                existing = self.active_tasks.get(arbitration_id)
+                if existing is None:
+                    self._start_task(frame)
+                    self.active_tasks[arbitration_id] = frame
                 else:
-                    self._create_task(es_fv, raw_val)
+                    # Update the running frame in place, writers keep references to it
+                    if existing.word != frame.word or existing.period != frame.period:
+                        self._update_task(existing, frame.word, frame.period)
+                    existing.values = frame.values
 
             # Remove tasks that are no longer needed
             for arbitration_id in list(self.active_tasks.keys()):
-                if arbitration_id not in seen_ids:
-                    self.active_tasks[arbitration_id][0].stop()
-                    del self.active_tasks[arbitration_id]
-
-    def _create_task(self, es_fv, raw_val):
-        # print(f"VAL: {es_fv}  RAW: {raw_val}")
-        # print(hex(compute_frame_values([es_fv], [raw_val])))
-        mess = can.Message(
-            arbitration_id=prepare_frame(**es_fv['frame']),
-            data=compute_frame_values([es_fv], [raw_val]).to_bytes(8, 'big'),
-            is_extended_id=True
-        )
-        # print(es_fv)
-        period = es_fv['frame']['period'] / 1000  # Convert milliseconds to seconds
-        task = self.bus.send_periodic(mess, period)
-        self.active_tasks[prepare_frame(**es_fv['frame'])] = (task, es_fv, raw_val)
+                if arbitration_id not in frames:
+                    self._stop_task(self.active_tasks.pop(arbitration_id))
+
+    def bus_load(self) -> Optional[float]:
+        """Expected average bus load of the active frames (fraction of the bitrate), None without a bitrate"""
+        return self.planner.load() if self.planner is not None else None
+
+    def _plan(self, arbitration_id: int, period: int) -> float:
+        """
+        Checks the bus load with the frame sent every period ms and reserves the least loaded phase for it,
+        returns the phase in seconds. A rejected frame keeps its previous reservation.
+        Without a scheduler the phase could not be applied, the frame is reserved at phase 0.
+        """
+        if self.planner is None:
+            return 0.0
+
+        previous = self.planner.frames.get(arbitration_id)
+        self.planner.remove(arbitration_id)
+        load = self.planner.load((period, 8))
+        if load > self.max_load:
+            message = (f"Frame {arbitration_id:#x} every {period} ms raises the bus load to {load:.0%} "
+                       f"(limit {self.max_load:.0%})")
+            if self.on_overload == 'reject':
+                if previous is not None:
+                    self.planner.add(arbitration_id, previous[0], phase_ms=previous[2])
+                raise BusLoadError(message)
+            logger.warning(message)
+        return self.planner.add(arbitration_id, period, phase_ms=None if self.scheduler is not None else 0) / 1000
+
+    def _start_task(self, frame: PeriodicFrame, phase: Optional[float] = None):
+        if frame.period <= 0:
+            raise ValueError(f"Frame {frame.arbitration_id:#x} has period {frame.period} ms, "
+                             f"periodic frames need a positive period")
+        if phase is None:
+            phase = self._plan(frame.arbitration_id, frame.period)
+        period = frame.period / 1000  # Convert milliseconds to seconds
+        if self.scheduler is not None:
+            frame.task = self.scheduler.send_periodic(frame.message(), period, phase)
+        else:
+            frame.task = self.bus.send_periodic(frame.message(), period)
+        frame.task_period = frame.period
+        self.stats['started'] += 1
+
+    def _stop_task(self, frame: PeriodicFrame):
+        frame.task.stop()
+        frame.task = None
+        if self.planner is not None:
+            self.planner.remove(frame.arbitration_id)
+
+    def _update_task(self, frame: PeriodicFrame, word: int, period: int):
+        """
+        Applies a new payload word and period to the frame. The payload of the running task is replaced without
+        touching its timer, the task is only recreated when the period changed or the task can not be modified.
+        A new period is checked by the planner first, when it is rejected the frame and its task stay as they were.
+        """
+        if frame.task_period == period:
+            frame.word = word
+            try:
+                frame.task.modify_data(frame.message())
+                self.stats['modified'] += 1
+                return
+            except (AttributeError, NotImplementedError):
+                pass
+
+        phase = self._plan(frame.arbitration_id, period)
+        frame.word, frame.period = word, period
+        frame.task.stop()
+        self._start_task(frame, phase)
+        self.stats['restarted'] += 1
 
     def stop_all(self):
         """Stops all active periodic sending tasks."""
         with self.lock:
-            for arbitration_id, (task, _, _) in self.active_tasks.items():
-                task.stop()
+            for frame in self.active_tasks.values():
+                self._stop_task(frame)
             self.active_tasks.clear()
 
 class CANBusReader:
-    def __init__(self, bus):
+    def __init__(self, bus, depth: int = 100, max_age: Optional[float] = None, registry: Optional[SignalRegistry] = None,
+                 capture: Optional[CaptureWriter] = None, timeseries: Optional[TimeSeriesStore] = None,
+                 latest: Optional[LatestValues] = None, transport: Optional[TransportReassembler] = None):
+        """
+        depth: number of frames kept per arbitration ID
+        max_age: frames older than this many seconds (relative to the newest frame of the same ID) are dropped
+        registry: signals decoded into the latest value table as frames arrive
+        capture: every received frame is also written to this capture
+        timeseries: decoded values are also appended to this store
+        latest: latest value table to decode into (a new one by default)
+        transport: reassembles transport protocol transfers, their messages are decoded like single frames
+        """
         self.bus = bus
+        self.depth = depth
+        self.max_age = max_age
+        self.registry = registry if registry is not None else load_registry()
+        self.capture = capture
+        self.timeseries = timeseries
+        self.latest = latest if latest is not None else LatestValues()  # read without locking, see LatestValues
+        self.transport = transport
+        self.dispatcher = Dispatcher(self.registry)
+        self.seq = 0
         self.running = False
         self.read_thread = threading.Thread(target=self._read_messages, daemon=True)
-        self.message_storage = {}  # Integrated storage for read messages
+        self.message_storage = {}  # {arbitration_id: MessageRing}
         self.storage_lock = threading.Lock()  # Protect access to message_storage
 
     def start(self):
@@ -194,19 +433,49 @@ class CANBusReader:
         """The method executed by the reading thread to continuously read messages."""
         while self.running:
             message = self.bus.recv(timeout=1.0)  # Adjust timeout as needed
-            # print(message)
             if message:
-                # Store the message in the integrated storage
-                with self.storage_lock:
-                    # Example storage structure: a list of messages for each arbitration ID
-                    if message.arbitration_id not in self.message_storage:
-                        self.message_storage[message.arbitration_id] = []
-                    self.message_storage[message.arbitration_id].append(message)
+                self._handle_frame(message.arbitration_id, message.timestamp, message.data, message.is_extended_id)
+
+    def _handle_frame(self, arbitration_id: int, timestamp: float, data: bytes, is_extended_id: bool = True):
+        """Stores a received frame and decodes its signals into the latest value table."""
+        self.seq += 1
+        if self.capture is not None:
+            self.capture.write(timestamp, arbitration_id, data, is_extended_id)
+        # J1939 signals are carried by 29-bit identifiers only, standard frames (e.g. OBD) are just stored
+        if is_extended_id:
+            pgn = pgn_of(arbitration_id)
+            frame = self.registry.frame_from(pgn, arbitration_id & 0xff)
+            payload = data
+            if frame is None and self.transport is not None and (pgn == TP_CM or pgn == TP_DT):
+                message = self.transport.receive(arbitration_id, timestamp, data)
+                if message is not None:
+                    # decoded like a single frame of the reassembled PGN (signals are defined on its first 8 bytes)
+                    payload = message.data
+                    frame = self.registry.frame_from(message.pgn, message.source_address)
+            if frame is not None:
+                values = frame.decode(payload)
+                self.latest.update(frame.signals, values, timestamp, self.seq)
+                if self.timeseries is not None:
+                    self.timeseries.record(frame.signals, values, timestamp)
+                self.dispatcher.dispatch(frame, values, timestamp, self.seq)
+
+        with self.storage_lock:
+            ring = self.message_storage.get(arbitration_id)
+            if ring is None:
+                ring = self.message_storage[arbitration_id] = MessageRing(self.depth, self.max_age, is_extended_id)
+            ring.append(timestamp, data)
 
     def get_messages(self, arbitration_id):
-        """Retrieves stored messages for a given arbitration ID."""
+        """Retrieves stored messages for a given arbitration ID, oldest first."""
         with self.storage_lock:
-            return self.message_storage.get(arbitration_id, [])
+            ring = self.message_storage.get(arbitration_id)
+            records = ring.records() if ring is not None else []
+            is_extended_id = ring.is_extended_id if ring is not None else True
+
+        return [
+            can.Message(timestamp=timestamp, arbitration_id=arbitration_id, is_extended_id=is_extended_id, data=data[:dlc])
+            for timestamp, dlc, data in records
+        ]
 
     def clear_messages(self, arbitration_id=None):
         """Clears stored messages, either for a specific arbitration ID or all."""
@@ -218,66 +487,137 @@ class CANBusReader:
                 self.message_storage.clear()
 
     def cleanup_old_messages(self, max_age_seconds=5):
-        """Removes messages that are older than max_age_seconds."""
+        """
+        Removes messages that are older than max_age_seconds.
+        Not needed for bounding memory (storage is a fixed-size ring per ID, see max_age for automatic expiry).
+        """
         with self.storage_lock:
-            current_time = time.time()
-            for arbitration_id, messages in list(self.message_storage.items()):
-                # Filter out messages newer than the max age
-                self.message_storage[arbitration_id] = [
-                    msg for msg in messages if current_time - msg.timestamp <= max_age_seconds
-                ]
-
-                # If this leaves the list empty, remove the arbitration ID entry entirely
-                if not self.message_storage[arbitration_id]:
+            oldest_allowed = time.time() - max_age_seconds
+            for arbitration_id, ring in list(self.message_storage.items()):
+                ring.evict_older_than(oldest_allowed)
+
+                # If this leaves the ring empty, remove the arbitration ID entry entirely
+                if not ring:
                     del self.message_storage[arbitration_id]
 
 
+class SignalWriter:
+    """
+    Writer bound to one signal, obtained once with _Client.writer for control loops.
+    A write packs the value into the running frame's word and message buffer in place, there is no config lookup,
+    no task restart and apart from the integer result of packing no allocation.
+    """
+    __slots__ = ('signal', 'immediate', '_pack', '_task_mng', '_bus', '_in_place')
+
+    def __init__(self, signal: CompiledSignal, task_mng: SendingTaskManager, bus: can.Bus, immediate: bool = False):
+        self.signal = signal
+        self.immediate = immediate
+        self._pack = signal.codec.pack
+        self._task_mng = task_mng
+        self._bus = bus
+        # The transmit scheduler sends the frame's message object itself, other tasks need modify_data
+        self._in_place = task_mng.scheduler is not None
+
+    def write(self, value: Number) -> bool:
+        task_mng = self._task_mng
+        with task_mng.lock:
+            frame = task_mng.active_tasks.get(self.signal.arbitration_id)
+            if frame is not None and frame.period <= self.signal.period:
+                frame.values[self.signal.id] = value
+                frame.word = self._pack(frame.word, value)
+                _pack_word(frame.msg.data, 0, frame.word)
+                if not self._in_place:
+                    frame.task.modify_data(frame.msg)
+            else:
+                frame = None
+        if frame is None:
+            # Frame not running (yet) or its period is shortened by this signal, take the regular path
+            task_mng.update_or_create_task(self.signal, value)
+            frame = task_mng.active_tasks[self.signal.arbitration_id]
+
+        if self.immediate:
+            try:
+                self._bus.send(frame.msg)
+            except can.CanError:
+                logger.error("Message NOT sent")
+                return False
+        return True
+
+    __call__ = write
+
+
 class _Client:
     """
     Client wrapper class that interacts with the CAN bus
     """
-    def __init__(self, bus: can.Bus, reader: CANBusReader, task_mng: SendingTaskManager):
+    def __init__(self, bus: can.Bus, reader: CANBusReader, task_mng: SendingTaskManager, registry: Optional[SignalRegistry] = None):
         self._bus = bus
         self._reader = reader
         self._task_mng = task_mng
 
-        self._config = read_config()
+        self._registry = registry if registry is not None else load_registry()
 
-    def read(self, index: int) -> Optional[int]:
+    def read(self, index: int) -> Optional[Number]:
         """
-        Returns the last received value for given index (see can_sdk.config for more information on metrics)
+        Returns the last received physical value for given index (see can_sdk.config for more information on metrics)
         """
+        latest = self._reader.latest.get(index)
+        return latest.value if latest is not None else None
 
-        val = next(x for x in self._config if x["id"] == index)
-
-        arb_id = prepare_frame(**val['frame']) | 3
-
-        msg = next(iter(self._reader.get_messages(arb_id)), None)
+    def read_latest(self, index: int) -> Optional[SignalValue]:
+        """
+        Returns the last received value for given index together with its timestamp and sequence number
+        """
+        return self._reader.latest.get(index)
 
-        if msg is not None:
-            if arb_id == 0xc000003:
-                parsed_val = (int.from_bytes(msg.data, "little") & 0x00ffff0000) >> 16
-            else:
-                parsed_val = int.from_bytes(msg.data, "little")
+    def history(self, index: int, start: float = float('-inf'), end: float = float('inf')):
+        """
+        Returns (timestamps, values) arrays of the given index received within [start, end],
+        requires a Connection created with a TimeSeriesStore (see can_sdk.timeseries)
+        """
+        if self._reader.timeseries is None:
+            raise RuntimeError("Connection was created without a timeseries store")
+        return self._reader.timeseries.range(index, start, end)
 
-            return parsed_val
-        else:
-            return None
+    def read_message(self, pgn: int, source_address: Optional[int] = None) -> Optional[TransportMessage]:
+        """
+        Returns the newest message of the PGN received with the transport protocol (e.g. DM1 with all its DTCs),
+        from the given source address or from any source if None
+        """
+        if self._reader.transport is None:
+            raise RuntimeError("Connection was created without transport protocol reassembly")
+        return self._reader.transport.get(pgn, source_address)
 
+    def subscribe(self, signal_ids: Iterable[int], callback: Callback,
+                  min_interval: Optional[float] = None, on_change_only: bool = False) -> Subscription:
+        """
+        Calls callback(signal_id, SignalValue) from the reader thread whenever one of the signals is received.
+        min_interval: seconds that have to pass between two deliveries of the same signal
+        on_change_only: skip values equal to the previously delivered one
+        Call cancel() on the returned subscription to stop receiving values.
+        """
+        return self._reader.dispatcher.add(signal_ids, callback, min_interval, on_change_only)
 
     def write(self, index: int, value: int) -> bool:
         """
         Writes a value to the given index (see can_sdk.config for more information on metrics)
         """
 
-        val = next(x for x in self._config if x["id"] == index)
+        signal = self._registry[index]
 
         try:
-            self._task_mng.update_or_create_task(val, value)
+            self._task_mng.update_or_create_task(signal, value)
             return True
         except:
             return False
 
+    def writer(self, index: int, immediate: bool = False) -> SignalWriter:
+        """
+        Returns a writer bound to the given index for low-latency repeated writes (e.g. control loops).
+        immediate: also send the frame right away instead of waiting for its next periodic transmission
+        """
+        return SignalWriter(self._registry[index], self._task_mng, self._bus, immediate)
+
     def receiving(self, target_id: int, value: int, kind: str):
         if kind == "rx":
             self.write(target_id, value)
@@ -303,17 +643,11 @@ def main():
         client.write(0, 1000)
         time.sleep(1)
 
-        # print("READING 5")
-        while True:
-            client.read(5)
-            time.sleep(200/1000)
-
-
+        client.subscribe([5], lambda signal_id, value: logger.info(f"{signal_id}: {value.value}"), on_change_only=True)
 
         try:
             while True:
                 time.sleep(5)
-                client._reader.cleanup_old_messages()
         except KeyboardInterrupt:
             pass
     logger.info("SDK closed")
@@ -0,0 +1,230 @@
+import marshal
+
+from types import CodeType
+from typing import List, Optional, Sequence, Union
+
+Number = Union[int, float]
+
+FRAME_MASK = 0xffffffffffffffff  # unused bits of a J1939 frame are sent as ones (not available)
+TABLE_BITS = 4  # fields up to this size (flags, states) are encoded by a table lookup
+# {'_B<n>': the values of a byte placed at byte n of the frame word (counted from the least significant byte)}
+_BYTES = {f"_B{n}": tuple(b << 8 * n for b in range(256)) for n in range(8)}
+
+
+class SignalCodec:
+    """
+    Pack/unpack plan of a single signal inside the big-endian 64-bit frame word.
+    Everything that does not depend on the value itself is computed once here.
+    """
+    __slots__ = ('bit_index', 'num_bits', 'shift', 'mask', 'clear', 'swap', 'nbytes',
+                 'analog', 'factor', 'offset', 'scale')
+
+    def __init__(self, bit_index: int, num_bits: int, analog: bool,
+                 factor: Optional[Number] = None, offset: Optional[Number] = None, dec: Optional[int] = None) -> None:
+        if bit_index < 0 or num_bits <= 0 or bit_index + num_bits > 64:
+            raise ValueError(f"Signal at bit {bit_index} with {num_bits} bits does not fit into an 8 byte frame")
+
+        self.bit_index = bit_index
+        self.num_bits = num_bits
+        # bit_index counts from the most significant bit of the big-endian 64-bit payload
+        self.shift = 64 - bit_index - num_bits
+        self.mask = (1 << num_bits) - 1
+        self.clear = FRAME_MASK & ~(self.mask << self.shift)
+        # multi-byte values are transmitted little-endian (J1939), single bytes and flags as they are
+        self.swap = num_bits > 8
+        if self.swap and (num_bits % 8 or bit_index % 8):
+            raise ValueError(f"Multi-byte signal at bit {bit_index} with {num_bits} bits is not byte aligned")
+        self.nbytes = num_bits // 8
+
+        self.analog = analog
+        self.factor = factor
+        self.offset = offset
+        self.scale = 10 ** dec if analog else 1
+
+    def to_raw(self, value: Number) -> int:
+        """
+        Converts a physical value to the raw bus value (inverse of to_physical)
+        """
+        if self.analog:
+            return int((value - self.offset) / self.factor * self.scale)
+        return int(value)
+
+    def to_physical(self, raw: int) -> Number:
+        """
+        Converts a raw bus value to the physical value using factor, offset and decimals
+        """
+        if self.analog:
+            return raw / self.scale * self.factor + self.offset
+        return raw
+
+    def pack(self, word: int, value: Number) -> int:
+        """
+        Returns the frame word with this signal's bits replaced by the encoded value
+        """
+        raw = self.to_raw(value) & self.mask
+        if self.swap:
+            raw = int.from_bytes(raw.to_bytes(self.nbytes, 'little'), 'big')
+        return (word & self.clear) | (raw << self.shift)
+
+    def unpack_raw(self, word: int) -> int:
+        raw = (word >> self.shift) & self.mask
+        if self.swap:
+            raw = int.from_bytes(raw.to_bytes(self.nbytes, 'big'), 'little')
+        return raw
+
+    def unpack(self, word: int) -> Number:
+        """
+        Extracts the physical value of this signal from the frame word
+        """
+        return self.to_physical(self.unpack_raw(word))
+
+
+def word_of(data: Union[bytes, bytearray, memoryview]) -> int:
+    """
+    Returns the big-endian 64-bit frame word of a payload, padding short payloads with ones
+    """
+    if len(data) != 8:
+        data = bytes(data[:8]).ljust(8, b'\xff')
+    return int.from_bytes(data, 'big')
+
+
+class FrameCodec:
+    """
+    Encoder/decoder of all signals sharing one frame (PGN).
+    The plans of the signals are unrolled into one generated function per direction,
+    so encoding or decoding a frame is a handful of integer operations and table lookups without any loop.
+    Binary values are encoded from integers (or bools) only, as by compute_frame_values.
+    """
+    __slots__ = ('signals', 'codecs', 'encode', 'decode_word', '_code', '__weakref__')
+
+    def __init__(self, signals: Sequence, code: Optional[CodeType] = None) -> None:
+        self.signals = tuple(signals)
+        self.codecs = tuple(s.codec for s in self.signals)
+        self._code = code if code is not None else _compile(self.codecs)
+        namespace = {'_trunc': float.__trunc__, **_BYTES}
+        exec(self._code, namespace)
+        self.encode, self.decode_word = namespace['encode'], namespace['decode_word']
+
+    def decode(self, data: Union[bytes, bytearray, memoryview]) -> List[Number]:
+        """
+        Unpacks physical values (aligned with self.signals) from a payload
+        """
+        return self.decode_word(word_of(data))
+
+    def __getstate__(self):
+        # the generated code is kept in marshal format (specific to the Python version) to skip compiling it again
+        return self.signals, marshal.dumps(self._code)
+
+    def __setstate__(self, state):
+        signals, code = state
+        self.__init__(signals, marshal.loads(code))
+
+
+def _swap_expr(expr: str, nbytes: int, shift: int = 0) -> str:
+    """
+    Source of an expression reversing the order of nbytes bytes of an integer expression,
+    the ones starting at bit shift (counted from the least significant bit)
+    """
+    def bits(offset: int) -> str:
+        return f"({expr}) >> {offset}" if offset else f"({expr})"
+
+    if nbytes == 2:
+        # the product holds the two bytes twice side by side, its middle 16 bits are the swapped bytes
+        return f"({bits(shift)} & 0xffff) * 0x10001 >> 8 & 0xffff"
+    terms = []
+    for i in range(nbytes):
+        position = 8 * (nbytes - 1 - i)
+        terms.append(f"({bits(shift + 8 * i)} & 0xff) << {position}" if position else f"({bits(shift + 8 * i)} & 0xff)")
+    return ' | '.join(terms)
+
+
+def _to_raw_expr(codec: SignalCodec, var: str) -> str:
+    """
+    Source of the raw value of a physical value. Binary values are taken as they are (integers, as for
+    compute_frame_values), analog ones are always floats after the division, float.__trunc__ is cheaper than int()
+    """
+    if not codec.analog:
+        return var
+    expr = var if codec.offset == 0 else f"({var} - {codec.offset!r})"
+    expr = f"{expr} / {codec.factor!r}"
+    if codec.scale != 1:
+        expr = f"{expr} * {codec.scale!r}"
+    return f"_trunc({expr})"
+
+
+def _field_expr(codec: SignalCodec, raw: str) -> str:
+    """
+    Source of the bits of the frame word holding the (integer) raw value.
+    Operations on the 64-bit word are the expensive ones, so fields are placed with table lookups where possible:
+    small fields index a tuple of their placed values, byte aligned fields the tables of placed bytes (_BYTES)
+    """
+    if codec.num_bits <= TABLE_BITS:
+        return f"{tuple(raw << codec.shift for raw in range(codec.mask + 1))!r}[{raw} & {codec.mask:#x}]"
+    if codec.num_bits % 8 == 0 and codec.shift % 8 == 0:
+        terms = []
+        for i in range(codec.nbytes):
+            # multi-byte values are little-endian, their first byte is the lowest one of the raw value
+            position = codec.shift // 8 + (codec.nbytes - 1 - i if codec.swap else i)
+            byte = f"{raw} >> {8 * i} & 0xff" if i else f"{raw} & 0xff"
+            terms.append(f"_B{position}[{byte}]")
+        return ' | '.join(terms)
+    return f"({raw} & {codec.mask:#x}) << {codec.shift}" if codec.shift else f"({raw} & {codec.mask:#x})"
+
+
+def _to_physical_expr(codec: SignalCodec, var: str) -> str:
+    if not codec.analog:
+        return var
+    expr = var if codec.scale == 1 else f"{var} / {codec.scale!r}"
+    expr = f"{expr} * {codec.factor!r}"
+    if codec.offset != 0:
+        expr = f"{expr} + {codec.offset!r}"
+    return expr
+
+
+def _compile(codecs: Sequence[SignalCodec]) -> CodeType:
+    """
+    Generates and compiles the encode(values, word=None) and decode_word(word) functions of a frame, e.g. for an
+    engine speed (16 bits at bit 24, factor 0.125) and a 2-bit lamp at bit 4:
+
+        def encode(values, word=None):
+            v0, v1, = values
+            r0 = _trunc(v0 / 0.125)
+            fields = _B4[r0 & 0xff] | _B3[r0 >> 8 & 0xff] | (0, 1 << 58, 2 << 58, 3 << 58)[v1 & 0x3]
+            if word is None:
+                return 0xf3ffff0000ffffff | fields
+            return (word & 0xf3ffff0000ffffff) | fields
+
+    encode starts from a frame with all unused bits set (FRAME_MASK) unless the word to update is given.
+    """
+    names = [f"v{i}" for i in range(len(codecs))]
+    clear = FRAME_MASK
+    for c in codecs:
+        clear &= c.clear
+
+    encode = ["def encode(values, word=None):"]
+    if codecs:
+        encode.append(f"    {', '.join(names)}, = values")
+    terms = []
+    for i, (name, c) in enumerate(zip(names, codecs)):
+        raw = _to_raw_expr(c, name)
+        if c.swap:
+            # used once per byte
+            encode.append(f"    r{i} = {raw}")
+            raw = f"r{i}"
+        terms.append(_field_expr(c, raw))
+    encode += [
+        f"    fields = {' | '.join(terms) or '0'}",
+        "    if word is None:",
+        f"        return {clear:#x} | fields",
+        f"    return (word & {clear:#x}) | fields",
+    ]
+
+    decode = ["def decode_word(word):"]
+    for name, c in zip(names, codecs):
+        if c.swap:
+            decode.append(f"    {name} = {_swap_expr('word', c.nbytes, c.shift)}")
+        else:
+            decode.append(f"    {name} = word >> {c.shift} & {c.mask:#x}" if c.shift else f"    {name} = word & {c.mask:#x}")
+    decode.append(f"    return [{', '.join(_to_physical_expr(c, n) for n, c in zip(names, codecs))}]")
+
+    return compile('\n'.join(encode + decode), '<can_sdk.codec>', 'exec')
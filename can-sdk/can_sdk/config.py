@@ -1,7 +1,25 @@
+import hashlib
 import json
+import logging
+import os
+import pickle
+import sys
+import threading
 
 from enum import Enum
-from typing import TypedDict
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple, TypedDict, Union
+from typing_extensions import Unpack
+
+from can_sdk.codec import FrameCodec, SignalCodec
+
+logger = logging.getLogger('sdk')
+
+CONFIG_PATH = './config_system.json'
+CACHE_VERSION = (4, sys.implementation.cache_tag)  # the cache holds marshalled code, see FrameCodec
+# compiled registries are cached in $CAN_SDK_CACHE_DIR (default: the user cache directory),
+# setting CAN_SDK_NO_CACHE to a non-empty value disables the cache
+CACHE_DIR_ENV = 'CAN_SDK_CACHE_DIR'
+NO_CACHE_ENV = 'CAN_SDK_NO_CACHE'
 
 class FrameValueKind(Enum):
     BINARY = 1,
@@ -31,16 +49,30 @@ class FrameValue(TypedDict):
     dec: int
     dim: str
     frame: PrepareFrameParams
+    bus: Optional[str]  # name of the bus carrying the frame (see can_sdk.multi), None for the default bus
+    source: Optional[int]  # only frames from this source address are decoded (source_addr of the entry), None: any
+
+def _source_addr(data: dict) -> Optional[int]:
+    source_addr = data.get('source_addr')
+    if isinstance(source_addr, str):
+        source_addr = int(source_addr, 0)
+    if source_addr is not None and not 0 <= source_addr <= 0xff:
+        raise ValueError(f"source_addr {source_addr} is not an 8-bit address")
+    return source_addr
 
 def _create_frame_value(data: any) -> FrameValue:
+    source_addr = _source_addr(data)
+    frame = PrepareFrameParams(
+        pgn=int(data['pgn'], 0),
+        priority=data['prio'],
+        period=data['period'],
+    )
+    if source_addr is not None:
+        frame['source_addr'] = source_addr
     return FrameValue(
         id=data['id'],
         name=data['name'],
-        frame=PrepareFrameParams(
-            pgn=int(data['pgn'], 0),
-            priority=data['prio'],
-            period=data['period'],
-        ),
+        frame=frame,
         kind=FrameValueKind.BINARY if data['kindtype'] == 'binary' else FrameValueKind.ANALOG,
         direction=FrameValueDirection.RX if data['kind'] == 'rx' else FrameValueDirection.TX,
         bit_index=data['bitindex'],
@@ -48,12 +80,294 @@ def _create_frame_value(data: any) -> FrameValue:
         factor=data['factor'],
         offset=data['offset'],
         dec=data['dec'],
-        dim=data['dim']
+        dim=data['dim'],
+        bus=data.get('bus'),
+        source=source_addr,
     )
 
-def read() -> list[FrameValue]:
-    with open('./config_system.json', 'r') as file:
-        return list(map(_create_frame_value, json.load(file)))
+def _database_path(data: dict, directory: str) -> str:
+    return os.path.abspath(os.path.join(directory, data['database']))
+
+def _database_frame_value(data: dict, directory: str) -> FrameValue:
+    """Frame value of an entry referencing a signal of a DBC or DA database (see can_sdk.dbc)"""
+    from can_sdk.dbc import load_database
+
+    database = load_database(_database_path(data, directory))
+    overrides = {key: data[key] for key in ('name', 'prio', 'period', 'dec', 'dim', 'bus') if key in data}
+    if 'source_addr' in data:
+        overrides['source_addr'] = _source_addr(data)
+    return database.frame_value(data['signal'], data['id'], data.get('kind', 'tx'), **overrides)
+
+def _parse(entries: list, path: str) -> List[FrameValue]:
+    directory = os.path.dirname(path)
+    values = []
+    for position, data in enumerate(entries):
+        try:
+            if 'database' in data:
+                values.append(_database_frame_value(data, directory))
+            else:
+                values.append(_create_frame_value(data))
+        except (KeyError, TypeError, ValueError) as e:
+            raise ValueError(f"{path}: invalid entry {position} ({data.get('name', '?') if isinstance(data, dict) else data!r}): {e!r}") from e
+    return values
+
+def read(path: str = CONFIG_PATH) -> list[FrameValue]:
+    """
+    Returns the frame values of the configuration (cached, see load_registry).
+    The returned dicts are shared between calls and must not be modified.
+    """
+    return [signal.value for signal in load_registry(path)]
+
+
+def prepare_frame(**kwargs: Unpack[PrepareFrameParams]) -> int:
+    return (kwargs['priority'] << 26) | (kwargs.pop('data_page', 0) << 25) | (kwargs['pgn'] << 8) | kwargs.pop('source_addr', 0)
+
+def pgn_of(arbitration_id: int) -> int:
+    """
+    Returns the PGN carried by a 29-bit J1939 identifier (destination address of PDU1 frames is masked out)
+    """
+    pgn = (arbitration_id >> 8) & 0x3ffff
+    if (pgn >> 8) & 0xff < 240:
+        pgn &= 0x3ff00
+    return pgn
+
+
+class CompiledSignal:
+    """
+    Frame value with its identifier and bit layout resolved once, so the hot paths only do attribute lookups
+    """
+    __slots__ = ('id', 'name', 'value', 'direction', 'kind', 'arbitration_id', 'pgn', 'period', 'bus', 'source', 'codec')
+
+    def __init__(self, value: FrameValue) -> None:
+        self.id = value['id']
+        self.name = value['name']
+        self.value = value
+        self.direction = value['direction']
+        self.kind = value['kind']
+
+        self.arbitration_id = prepare_frame(**value['frame'])
+        self.pgn = pgn_of(self.arbitration_id)
+        self.period = value['frame']['period']
+        self.bus = value.get('bus')
+        self.source = value.get('source')
+
+        try:
+            self.codec = SignalCodec(
+                bit_index=value['bit_index'],
+                num_bits=value['num_bits'],
+                analog=value['kind'] == FrameValueKind.ANALOG,
+                factor=value['factor'],
+                offset=value['offset'],
+                dec=value['dec'],
+            )
+        except ValueError as e:
+            raise ValueError(f"Signal {self.id} ({self.name}): {e}") from e
+
+    def __repr__(self) -> str:
+        return f"CompiledSignal(id={self.id}, name={self.name!r}, arbitration_id={self.arbitration_id:#x})"
+
+
+class SignalRegistry:
+    """
+    Signals of the configuration indexed by id, name and PGN (frame values are compiled, compiled signals are kept).
+    Signals pinned to a source address are only decoded from the frames of that sender, see frame_from.
+    """
+    def __init__(self, values: Iterable[Union[FrameValue, CompiledSignal]], _frames: Optional[Dict[int, FrameCodec]] = None) -> None:
+        self.signals: List[CompiledSignal] = [v if isinstance(v, CompiledSignal) else CompiledSignal(v) for v in values]
+
+        self._by_id: Dict[int, CompiledSignal] = {}
+        self._by_name: Dict[str, CompiledSignal] = {}
+        by_pgn: Dict[int, List[CompiledSignal]] = {}
+        for signal in self.signals:
+            if signal.id in self._by_id:
+                raise ValueError(f"Duplicate signal id {signal.id}")
+            self._by_id[signal.id] = signal
+            self._by_name[signal.name] = signal
+            by_pgn.setdefault(signal.pgn, []).append(signal)
+        self._by_pgn: Dict[int, Tuple[CompiledSignal, ...]] = {k: tuple(v) for k, v in by_pgn.items()}
+        self._frames: Dict[int, FrameCodec] = {}
+        for pgn, signals in self._by_pgn.items():
+            frame = _frames.get(pgn) if _frames is not None else None
+            self._frames[pgn] = frame if frame is not None and frame.signals == signals else FrameCodec(signals)
+        # {pgn: {source: codec of the unpinned signals and the ones pinned to source, None: of the unpinned ones}}
+        # only for PGNs with pinned signals, frames of the others are decoded with the codec of the whole PGN
+        self._pinned: Dict[int, Dict[Optional[int], Optional[FrameCodec]]] = {}
+        for pgn, signals in self._by_pgn.items():
+            sources = {signal.source for signal in signals if signal.source is not None}
+            if not sources:
+                continue
+            unpinned = tuple(signal for signal in signals if signal.source is None)
+            frames = self._pinned[pgn] = {None: FrameCodec(unpinned) if unpinned else None}
+            for source in sources:
+                frames[source] = FrameCodec(tuple(s for s in signals if s.source is None or s.source == source))
+
+    def __getitem__(self, index: int) -> CompiledSignal:
+        return self._by_id[index]
+
+    def __contains__(self, index: int) -> bool:
+        return index in self._by_id
+
+    def __iter__(self) -> Iterator[CompiledSignal]:
+        return iter(self.signals)
+
+    def __len__(self) -> int:
+        return len(self.signals)
+
+    def get(self, index: int) -> Optional[CompiledSignal]:
+        return self._by_id.get(index)
+
+    def by_name(self, name: str) -> Optional[CompiledSignal]:
+        return self._by_name.get(name)
+
+    def by_pgn(self, pgn: int) -> Tuple[CompiledSignal, ...]:
+        return self._by_pgn.get(pgn, ())
+
+    def by_arbitration_id(self, arbitration_id: int) -> Tuple[CompiledSignal, ...]:
+        """
+        Returns signals carried by the given identifier, regardless of its priority and source address
+        """
+        return self._by_pgn.get(pgn_of(arbitration_id), ())
+
+    def frame(self, pgn: int) -> Optional[FrameCodec]:
+        """
+        Returns the codec of all signals carried by the given PGN
+        """
+        return self._frames.get(pgn)
+
+    def frame_for(self, arbitration_id: int) -> Optional[FrameCodec]:
+        return self._frames.get(pgn_of(arbitration_id))
+
+    def frame_from(self, pgn: int, source: int) -> Optional[FrameCodec]:
+        """
+        Returns the codec of the signals to decode from a frame of the PGN sent by the given source address:
+        all of them unless some are pinned to another source
+        """
+        frames = self._pinned.get(pgn)
+        if frames is None:
+            return self._frames.get(pgn)
+        return frames.get(source, frames[None])
+
+    def frames(self) -> Iterator[FrameCodec]:
+        """
+        All codecs returned by frame and frame_from
+        """
+        yield from self._frames.values()
+        for frames in self._pinned.values():
+            yield from (frame for frame in frames.values() if frame is not None)
+
+    def pgns(self) -> Iterable[int]:
+        return self._by_pgn.keys()
+
+    def subset(self, signals: Iterable[CompiledSignal]) -> 'SignalRegistry':
+        """
+        Registry of some of the signals, sharing the compiled signals and the codecs of frames that are kept whole
+        """
+        return SignalRegistry(signals, self._frames)
+
+
+# {path: (source files, their (mtime_ns, size), sha256 of their contents, registry)}
+_registries: Dict[str, Tuple[Tuple[str, ...], Tuple[Tuple[int, int], ...], str, SignalRegistry]] = {}
+_registries_lock = threading.Lock()
+
+def _stamps(paths: Iterable[str]) -> Tuple[Tuple[int, int], ...]:
+    stamps = []
+    for path in paths:
+        stat = os.stat(path)
+        stamps.append((stat.st_mtime_ns, stat.st_size))
+    return tuple(stamps)
+
+def _digest(content: bytes, databases: Iterable[str]) -> str:
+    digest = hashlib.sha256(content)
+    for path in databases:
+        digest.update(path.encode())
+        with open(path, 'rb') as file:
+            digest.update(hashlib.sha256(file.read()).digest())
+    return digest.hexdigest()
+
+def _cache_dir() -> str:
+    directory = os.environ.get(CACHE_DIR_ENV)
+    if directory:
+        return directory
+    if sys.platform == 'win32':
+        base = os.environ.get('LOCALAPPDATA') or os.path.expanduser('~')
+    else:
+        base = os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+    return os.path.join(base, 'can_sdk')
+
+def _cache_path(path: str) -> str:
+    """Cache file of a configuration, keyed on its absolute path"""
+    key = hashlib.sha256(path.encode()).hexdigest()[:16]
+    return os.path.join(_cache_dir(), f"{os.path.basename(path)}.{key}.cache")
+
+def _load_cached(path: str, digest: str) -> Optional[SignalRegistry]:
+    try:
+        with open(_cache_path(path), 'rb') as file:
+            version, cached_digest, registry = pickle.load(file)
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        logger.debug(f"Ignoring unreadable config cache of {path}: {e!r}")
+        return None
+    if version != CACHE_VERSION or cached_digest != digest:
+        return None
+    return registry
+
+def _store_cached(path: str, digest: str, registry: SignalRegistry) -> None:
+    cache_path = _cache_path(path)
+    tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+    try:
+        # private to the user, the cache holds code that is executed when it is loaded
+        os.makedirs(os.path.dirname(cache_path), mode=0o700, exist_ok=True)
+        with open(tmp_path, 'wb') as file:
+            pickle.dump((CACHE_VERSION, digest, registry), file, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, cache_path)
+    except Exception as e:
+        logger.debug(f"Could not write config cache of {path}: {e!r}")
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+
+def load_registry(path: str = CONFIG_PATH, cache: bool = True) -> SignalRegistry:
+    """
+    Reads the configuration and compiles it into a SignalRegistry.
+    Registries are cached in memory keyed on the mtime and size of the configuration and the databases it references,
+    and persisted in the user cache directory (see CACHE_DIR_ENV) keyed on the SHA-256 of their contents,
+    so the files are only parsed and compiled again after one of them changed.
+    cache: use the persistent cache (also disabled by the NO_CACHE_ENV environment variable),
+           failing to write it is not an error
+    The returned registry is shared between callers.
+    """
+    path = os.path.abspath(path)
+    with _registries_lock:
+        entry = _registries.get(path)
+        if entry is not None:
+            try:
+                if _stamps(entry[0]) == entry[1]:
+                    return entry[3]
+            except OSError:
+                pass
+
+        with open(path, 'rb') as file:
+            content = file.read()
+        entries = json.loads(content)
+        directory = os.path.dirname(path)
+        databases = sorted({_database_path(data, directory) for data in entries if isinstance(data, dict) and 'database' in data})
+        sources = (path, *databases)
+        stamps = _stamps(sources)
+        digest = _digest(content, databases)
+
+        cache = cache and not os.environ.get(NO_CACHE_ENV)
+        if entry is not None and entry[2] == digest:
+            registry = entry[3]
+        else:
+            registry = _load_cached(path, digest) if cache else None
+            if registry is None:
+                registry = SignalRegistry(_parse(entries, path))
+                if cache:
+                    _store_cached(path, digest, registry)
+        _registries[path] = (sources, stamps, digest, registry)
+        return registry
 
 
 if __name__ == '__main__':
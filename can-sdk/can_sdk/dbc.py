@@ -0,0 +1,261 @@
+"""
+Signal databases (DBC files and J1939 Digital Annex CSV exports) as a source of frame values.
+
+Loading a database only parses its definitions into lightweight DatabaseSignal tuples, frame values (and through
+SignalRegistry the codecs) are created only for the signals a configuration references:
+
+    {"id": 6, "database": "j1939.dbc", "signal": "EEC1.EngineSpeed", "kind": "tx"}
+
+name, prio, period, dec and dim of such an entry optionally override the values from the database,
+source_addr pins the signal to one sender (like for entries without a database).
+"""
+import csv
+import logging
+import os
+import re
+
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional
+
+from can_sdk.config import FrameValue, FrameValueDirection, FrameValueKind, PrepareFrameParams, pgn_of
+
+logger = logging.getLogger('sdk')
+
+DEFAULT_PERIOD = 100  # ms, for messages without a cycle time
+DEFAULT_PRIORITY = 6
+
+
+class DatabaseSignal(NamedTuple):
+    name: str
+    message: str
+    pgn: int
+    priority: int
+    source_addr: int
+    period: int
+    bit_index: int
+    num_bits: int
+    factor: float
+    offset: float
+    dim: str
+
+
+def _bit_index(byte: int, bit: int, num_bits: int) -> Optional[int]:
+    """
+    Converts the position of a little-endian (Intel, J1939) field given by its least significant bit
+    (byte and bit counted from 0) into the bit_index of the frame value model, None if it cannot be represented
+    """
+    if num_bits <= 8:
+        if bit + num_bits > 8:
+            return None
+        return 8 * byte + 8 - bit - num_bits
+    if bit or num_bits % 8 or byte + num_bits // 8 > 8:
+        return None
+    return 8 * byte
+
+
+class SignalDatabase:
+    """
+    Signals of a database by name, both as "Signal" and "Message.Signal" (the latter is unique)
+    """
+    def __init__(self, path: str, signals: Iterable[DatabaseSignal]) -> None:
+        self.path = path
+        self.signals: Dict[str, DatabaseSignal] = {}
+        self._by_name: Dict[str, Optional[DatabaseSignal]] = {}
+        for signal in signals:
+            self.signals[f"{signal.message}.{signal.name}"] = signal
+            # a plain name that is used by several messages is ambiguous
+            self._by_name[signal.name] = None if signal.name in self._by_name else signal
+
+    def __len__(self) -> int:
+        return len(self.signals)
+
+    def __iter__(self) -> Iterator[DatabaseSignal]:
+        return iter(self.signals.values())
+
+    def __contains__(self, name: str) -> bool:
+        return self.get(name) is not None
+
+    def get(self, name: str) -> Optional[DatabaseSignal]:
+        signal = self.signals.get(name)
+        return signal if signal is not None else self._by_name.get(name)
+
+    def frame_value(self, name: str, id: int, direction: str = 'tx', **overrides) -> FrameValue:
+        """
+        Creates the frame value of a database signal.
+        direction: 'rx' (written by the SDK) or 'tx' (read by the SDK), as the kind of config_system.json entries
+        overrides: name, prio, period, dec or dim replacing the database values, bus, source_addr (decode only frames
+                   from this source address, sent with it)
+        """
+        signal = self.get(name)
+        if signal is None:
+            if self._by_name.get(name, False) is None:
+                raise KeyError(f"Signal {name!r} is defined by several messages of {self.path}, use 'Message.Signal'")
+            raise KeyError(f"Signal {name!r} is not defined in {self.path}")
+
+        binary = signal.num_bits <= 2 and signal.factor == 1 and signal.offset == 0
+        return FrameValue(
+            id=id,
+            name=overrides.get('name', signal.name),
+            frame=PrepareFrameParams(
+                pgn=signal.pgn,
+                priority=overrides.get('prio', signal.priority),
+                period=overrides.get('period', signal.period),
+                source_addr=overrides.get('source_addr', signal.source_addr),
+            ),
+            kind=FrameValueKind.BINARY if binary else FrameValueKind.ANALOG,
+            direction=FrameValueDirection.RX if direction == 'rx' else FrameValueDirection.TX,
+            bit_index=signal.bit_index,
+            num_bits=signal.num_bits,
+            factor=signal.factor,
+            offset=signal.offset,
+            dec=overrides.get('dec', 0),
+            dim=overrides.get('dim', signal.dim),
+            bus=overrides.get('bus'),
+            source=overrides.get('source_addr'),
+        )
+
+    def frame_values(self, names: Optional[Iterable[str]] = None, direction: str = 'tx', first_id: int = 0) -> List[FrameValue]:
+        """
+        Frame values of the given signals (all by default) with consecutive ids starting at first_id
+        """
+        if names is None:
+            names = list(self.signals)
+        return [self.frame_value(name, first_id + i, direction) for i, name in enumerate(names)]
+
+
+_MESSAGE = re.compile(r'BO_\s+(\d+)\s+(\w+)\s*:\s*(\d+)\s+(\w+)')
+_SIGNAL = re.compile(
+    r'SG_\s+(\w+)\s*(\w*)\s*:\s*(\d+)\|(\d+)@([01])([+-])\s*\(([^,]+),([^)]+)\)\s*\[[^\]]*\]\s*"([^"]*)"'
+)
+_CYCLE_TIME = re.compile(r'BA_\s+"GenMsgCycleTime"\s+BO_\s+(\d+)\s+(\d+)\s*;')
+_CYCLE_TIME_DEFAULT = re.compile(r'BA_DEF_DEF_\s+"GenMsgCycleTime"\s+(\d+)\s*;')
+
+
+def load_dbc(path: str) -> SignalDatabase:
+    """
+    Parses the messages and signals of a DBC file.
+    Only extended (J1939) identifiers are used, signals the frame value model cannot represent
+    (multiplexed, signed, big-endian wider than a byte, not byte aligned) are skipped.
+    """
+    with open(path, 'r', encoding='latin-1') as file:
+        text = file.read()
+
+    periods = {int(m[1]): int(m[2]) for m in _CYCLE_TIME.finditer(text)}
+    default = _CYCLE_TIME_DEFAULT.search(text)
+    default_period = int(default[1]) or DEFAULT_PERIOD if default else DEFAULT_PERIOD
+
+    signals = []
+    skipped = 0
+    message = None
+    for line in text.splitlines():
+        line = line.strip()
+        if line.startswith('BO_ '):
+            match = _MESSAGE.match(line)
+            message = None
+            if match is None:
+                continue
+            dbc_id = int(match[1])
+            if not dbc_id & 0x80000000:
+                continue  # standard identifiers do not carry a PGN
+            arbitration_id = dbc_id & 0x1fffffff
+            # event driven messages commonly have an explicit cycle time of 0, they are sent at the default period
+            message = (match[2], arbitration_id, periods.get(dbc_id) or default_period)
+        elif line.startswith('SG_ ') and message is not None:
+            match = _SIGNAL.match(line)
+            if match is None:
+                continue
+            name, multiplex, start, num_bits, little_endian, sign, factor, offset, dim = match.groups()
+            start, num_bits = int(start), int(num_bits)
+            message_name, arbitration_id, period = message
+            if little_endian == '1':
+                bit_index = _bit_index(start // 8, start % 8, num_bits)
+            else:
+                # big-endian fields start at their most significant bit, only fields inside one byte match the model
+                bit_index = 8 * (start // 8) + 7 - start % 8 if start % 8 + 1 >= num_bits else None
+            if multiplex or sign == '-' or bit_index is None:
+                logger.debug(f"{path}: skipping {message_name}.{name}, layout not supported")
+                skipped += 1
+                continue
+            signals.append(DatabaseSignal(
+                name=name, message=message_name, pgn=pgn_of(arbitration_id), priority=(arbitration_id >> 26) & 0x7,
+                source_addr=arbitration_id & 0xff, period=period, bit_index=bit_index, num_bits=num_bits,
+                factor=float(factor), offset=float(offset), dim=dim,
+            ))
+
+    if skipped:
+        logger.warning(f"{path}: {skipped} signals skipped, their layout is not supported (details in debug log)")
+    return SignalDatabase(path, signals)
+
+
+def _number(text: str) -> Optional[float]:
+    match = re.match(r'\s*([-+]?\d+(?:\.\d+)?(?:[eE][-+]?\d+)?)', text.replace(',', ''))
+    return float(match[1]) if match else None
+
+
+def _da_position(position: str, length: str):
+    """(byte, bit, num_bits) of a DA 'SPN Position in PG' ("4-5", "1.3") and 'SPN Length' ("2 bytes", "2 bits")"""
+    start = position.split('-')[0].strip()
+    byte, _, bit = start.partition('.')
+    size = _number(length)
+    if not byte.isdigit() or size is None:
+        return None
+    num_bits = int(size) * 8 if 'byte' in length else int(size)
+    return int(byte) - 1, int(bit) - 1 if bit else 0, num_bits
+
+
+def _da_period(rate: str) -> int:
+    match = re.search(r'(\d+(?:\.\d+)?)\s*(ms|s)\b', rate)
+    if match is None:
+        return DEFAULT_PERIOD
+    return int(float(match[1]) * (1 if match[2] == 'ms' else 1000))
+
+
+def load_da_csv(path: str) -> SignalDatabase:
+    """
+    Parses a CSV export of the J1939 Digital Annex (columns PGN, Acronym, SPN, SPN Name, SPN Position in PG,
+    SPN Length, Resolution, Offset, Units, Transmission Rate, Default Priority).
+    Signals are named by their SPN Name (or SPN<n>) within the message named by the Acronym,
+    non-numeric and variable position SPNs are skipped.
+    """
+    signals = []
+    with open(path, 'r', newline='', encoding='utf-8-sig') as file:
+        for row in csv.DictReader(file):
+            try:
+                pgn = int(row['PGN'], 0)
+                spn = int(row['SPN'])
+            except (KeyError, TypeError, ValueError):
+                continue
+            layout = _da_position(row.get('SPN Position in PG', ''), row.get('SPN Length', ''))
+            resolution = row.get('Resolution', '')
+            factor = _number(resolution)
+            if layout is None or (factor is None and 'bit-mapped' not in resolution and 'states' not in resolution):
+                continue
+            bit_index = _bit_index(*layout)
+            if bit_index is None:
+                continue
+            priority = _number(row.get('Default Priority', ''))
+            signals.append(DatabaseSignal(
+                name=row.get('SPN Name') or f"SPN{spn}", message=row.get('Acronym') or f"PGN{pgn}", pgn=pgn,
+                priority=int(priority) if priority is not None else DEFAULT_PRIORITY, source_addr=0,
+                period=_da_period(row.get('Transmission Rate', '')), bit_index=bit_index, num_bits=layout[2],
+                factor=factor if factor is not None and 'states' not in resolution else 1.0,
+                offset=_number(row.get('Offset', '')) or 0.0, dim=row.get('Units', ''),
+            ))
+    return SignalDatabase(path, signals)
+
+
+_databases: Dict[str, tuple] = {}  # {path: ((mtime_ns, size), SignalDatabase)}
+
+
+def load_database(path: str) -> SignalDatabase:
+    """
+    Loads a .dbc or DA .csv database, parsed databases are kept until the file changes
+    """
+    path = os.path.abspath(path)
+    stat = os.stat(path)
+    stamp = (stat.st_mtime_ns, stat.st_size)
+    entry = _databases.get(path)
+    if entry is not None and entry[0] == stamp:
+        return entry[1]
+    database = load_da_csv(path) if path.lower().endswith('.csv') else load_dbc(path)
+    _databases[path] = (stamp, database)
+    return database
@@ -0,0 +1,122 @@
+import logging
+import threading
+
+from typing import Callable, Dict, FrozenSet, Iterable, List, Optional, Sequence, Tuple
+
+from can_sdk.codec import FrameCodec, Number
+from can_sdk.config import SignalRegistry
+from can_sdk.storage import SignalValue
+
+logger = logging.getLogger('sdk')
+
+Callback = Callable[[int, SignalValue], None]
+
+
+class Subscription:
+    """
+    Callback subscribed to a set of signals, see _Client.subscribe
+    """
+    def __init__(self, dispatcher: 'Dispatcher', signal_ids: Sequence[int], callback: Callback,
+                 min_interval: Optional[float] = None, on_change_only: bool = False) -> None:
+        self.signal_ids = tuple(signal_ids)
+        self.callback = callback
+        self.min_interval = min_interval
+        self.on_change_only = on_change_only
+        self._dispatcher = dispatcher
+        self._last: Dict[int, SignalValue] = {}  # last value delivered per signal id
+
+    def cancel(self) -> None:
+        """Stops delivering values to the callback"""
+        self._dispatcher.remove(self)
+
+    def _deliver(self, signal_id: int, value: SignalValue) -> None:
+        if self.min_interval is not None or self.on_change_only:
+            last = self._last.get(signal_id)
+            if last is not None:
+                if self.on_change_only and last.value == value.value:
+                    return
+                if self.min_interval is not None and value.timestamp - last.timestamp < self.min_interval:
+                    return
+            self._last[signal_id] = value
+
+        try:
+            self.callback(signal_id, value)
+        except Exception:
+            logger.exception(f"Subscriber callback for signal {signal_id} failed")
+
+
+class Dispatcher:
+    """
+    Delivers decoded values to subscriptions.
+    Subscriptions are indexed by frame codec with the positions of their signals inside the frame precomputed,
+    so frames nobody subscribed to cost one dict lookup. The index is replaced as a whole on (un)subscribe,
+    the reader thread reads it without locking.
+    """
+    def __init__(self, registry: SignalRegistry) -> None:
+        self.registry = registry
+        self._subscriptions: List[Subscription] = []
+        self._index: Dict[FrameCodec, Tuple[Tuple[Subscription, Tuple[Tuple[int, int], ...]], ...]] = {}
+        self._pgns: FrozenSet[int] = frozenset()
+        self._positions: Optional[Dict[int, List[Tuple[FrameCodec, int]]]] = None
+        self._lock = threading.Lock()
+
+    def add(self, signal_ids: Iterable[int], callback: Callback,
+            min_interval: Optional[float] = None, on_change_only: bool = False) -> Subscription:
+        signal_ids = list(signal_ids)
+        for signal_id in signal_ids:
+            if signal_id not in self.registry:
+                raise KeyError(f"Unknown signal id {signal_id}")
+
+        subscription = Subscription(self, signal_ids, callback, min_interval, on_change_only)
+        with self._lock:
+            self._subscriptions.append(subscription)
+            self._rebuild()
+        return subscription
+
+    def remove(self, subscription: Subscription) -> None:
+        with self._lock:
+            if subscription in self._subscriptions:
+                self._subscriptions.remove(subscription)
+                self._rebuild()
+
+    def _rebuild(self) -> None:
+        if self._positions is None:
+            # {signal_id: [(frame, position of the signal in it)]}, a pinned signal is part of several frame codecs
+            self._positions = {}
+            for frame in self.registry.frames():
+                for position, signal in enumerate(frame.signals):
+                    self._positions.setdefault(signal.id, []).append((frame, position))
+        index: Dict[FrameCodec, List[Tuple[Subscription, Tuple[Tuple[int, int], ...]]]] = {}
+        for subscription in self._subscriptions:
+            by_frame: Dict[FrameCodec, List[Tuple[int, int]]] = {}
+            for signal_id in subscription.signal_ids:
+                for frame, position in self._positions[signal_id]:
+                    by_frame.setdefault(frame, []).append((position, signal_id))
+            for frame, positions in by_frame.items():
+                index.setdefault(frame, []).append((subscription, tuple(positions)))
+        self._index = {frame: tuple(entries) for frame, entries in index.items()}
+        self._pgns = frozenset(frame.signals[0].pgn for frame in self._index)
+
+    def pgns(self) -> Iterable[int]:
+        """PGNs with at least one subscribed signal"""
+        return self._pgns
+
+    def dispatch(self, frame: FrameCodec, values: Sequence[Number], timestamp: float, seq: int) -> None:
+        """Called by the reader thread with the decoded values of a frame (aligned with frame.signals)"""
+        entries = self._index.get(frame)
+        if not entries:
+            return
+        for subscription, positions in entries:
+            for position, signal_id in positions:
+                subscription._deliver(signal_id, SignalValue(values[position], timestamp, seq))
+
+    def dispatch_latest(self, frame: FrameCodec, values: Sequence[Optional[SignalValue]]) -> None:
+        """Delivers values (aligned with frame.signals) read from a latest value table, None for the ones to skip"""
+        entries = self._index.get(frame)
+        if not entries:
+            return
+        for subscription, positions in entries:
+            for position, signal_id in positions:
+                value = values[position]
+                if value is not None:
+                    subscription._deliver(signal_id, value)
@@ -0,0 +1,128 @@
+"""
+Decodes the configured signals from a recorded bus log and exports them.
+
+    python -m can_sdk.export trace.asc -o trace.csv
+    python -m can_sdk.export trace.blf -o trace_columns --format columns
+    python -m can_sdk.export candump.log -o trace.parquet --format parquet --signals 0 2
+"""
+import argparse
+import csv
+import json
+import logging
+import os
+
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+
+from can_sdk.bulk import SignalColumns
+from can_sdk.config import CompiledSignal, load_registry
+from can_sdk.ingest import decode_log
+
+logger = logging.getLogger('sdk')
+
+
+def _rows(batch: Dict[int, SignalColumns], signals: List[CompiledSignal]):
+    """Values of one chunk in long format ordered by timestamp: (timestamps, signal ids, values)"""
+    present = [s for s in signals if len(batch[s.id].timestamps)]
+    if not present:
+        return None
+    timestamps = np.concatenate([batch[s.id].timestamps for s in present])
+    ids = np.concatenate([np.full(len(batch[s.id].timestamps), s.id, dtype=np.int32) for s in present])
+    values = np.concatenate([batch[s.id].values.astype(np.float64) for s in present])
+    order = np.argsort(timestamps, kind='stable')
+    return timestamps[order], ids[order], values[order]
+
+
+def export_csv(batches: Iterable[Dict[int, SignalColumns]], signals: List[CompiledSignal], output: str) -> int:
+    names = {s.id: s.name for s in signals}
+    count = 0
+    with open(output, 'w', newline='') as file:
+        writer = csv.writer(file)
+        writer.writerow(['timestamp', 'signal_id', 'name', 'value'])
+        for batch in batches:
+            rows = _rows(batch, signals)
+            if rows is None:
+                continue
+            for timestamp, signal_id, value in zip(*(column.tolist() for column in rows)):
+                writer.writerow([repr(timestamp), signal_id, names[signal_id], repr(value)])
+            count += len(rows[0])
+    return count
+
+
+def export_columns(batches: Iterable[Dict[int, SignalColumns]], signals: List[CompiledSignal], output: str) -> int:
+    """
+    Writes one raw little-endian float64 file per signal and column (<id>.timestamp.f8, <id>.value.f8)
+    plus manifest.json, each column can be loaded with numpy.fromfile or numpy.memmap
+    """
+    os.makedirs(output, exist_ok=True)
+    files = {}
+    counts = {s.id: 0 for s in signals}
+    try:
+        for s in signals:
+            for column in ('timestamp', 'value'):
+                files[s.id, column] = open(os.path.join(output, f"{s.id}.{column}.f8"), 'wb')
+        for batch in batches:
+            for s in signals:
+                columns = batch[s.id]
+                columns.timestamps.astype('<f8').tofile(files[s.id, 'timestamp'])
+                columns.values.astype('<f8').tofile(files[s.id, 'value'])
+                counts[s.id] += len(columns.timestamps)
+    finally:
+        for file in files.values():
+            file.close()
+
+    manifest = [{'id': s.id, 'name': s.name, 'dim': s.value['dim'], 'count': counts[s.id],
+                 'timestamp': f"{s.id}.timestamp.f8", 'value': f"{s.id}.value.f8"} for s in signals]
+    with open(os.path.join(output, 'manifest.json'), 'w') as file:
+        json.dump(manifest, file, indent=2)
+    return sum(counts.values())
+
+
+def export_parquet(batches: Iterable[Dict[int, SignalColumns]], signals: List[CompiledSignal], output: str) -> int:
+    """Long format Parquet file written one row group per chunk (requires pyarrow)"""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = pa.schema([('timestamp', pa.float64()), ('signal_id', pa.int32()), ('value', pa.float64())])
+    count = 0
+    with pq.ParquetWriter(output, schema) as writer:
+        for batch in batches:
+            rows = _rows(batch, signals)
+            if rows is None:
+                continue
+            writer.write_table(pa.Table.from_arrays(list(rows), schema=schema))
+            count += len(rows[0])
+    return count
+
+
+EXPORTERS = {
+    'csv': export_csv,
+    'columns': export_columns,
+    'parquet': export_parquet,
+}
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('log', help="log file (.log candump, .asc, .blf, ... anything python-can reads)")
+    parser.add_argument('-o', '--output', required=True, help="output file (csv, parquet) or directory (columns)")
+    parser.add_argument('-f', '--format', choices=EXPORTERS, default='csv')
+    parser.add_argument('-s', '--signals', type=int, nargs='*', help="signal ids to export (default: all)")
+    parser.add_argument('--chunk-size', type=int, default=65536, help="frames decoded at once, bounds memory use")
+    args = parser.parse_args(argv)
+
+    registry = load_registry()
+    signals = [registry[i] for i in args.signals] if args.signals else list(registry)
+
+    logger.info(f"Exporting {len(signals)} signals from {args.log} to {args.output}")
+    try:
+        count = EXPORTERS[args.format](decode_log(args.log, registry, args.chunk_size), signals, args.output)
+    except ImportError as e:
+        parser.error(f"{args.format} export is not available: {e}")
+    logger.info(f"Exported {count} values")
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO)
+    main()
@@ -0,0 +1,73 @@
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from can_sdk.config import SignalRegistry
+
+PDU2_MASK = 0x3ffff << 8  # data page + PF + PS, any priority and source address
+PDU1_MASK = 0x3ff << 16  # data page + PF, PS is the destination address
+
+Filter = Tuple[int, int]  # (can_id, can_mask)
+
+
+def pgn_filter(pgn: int) -> Filter:
+    """
+    Acceptance filter matching every frame of the PGN regardless of priority, source and destination address
+    """
+    if (pgn >> 8) & 0xff < 240:
+        return (pgn << 8) & PDU1_MASK, PDU1_MASK
+    return (pgn << 8) & PDU2_MASK, PDU2_MASK
+
+
+def _merge_exact(filters: List[Filter]) -> List[Filter]:
+    """
+    Repeatedly merges pairs with equal masks whose ids differ in a single masked bit.
+    The merged set accepts exactly the same identifiers.
+    """
+    current = set(filters)
+    while True:
+        merged = set()
+        used = set()
+        items = sorted(current)
+        for i, (id_a, mask_a) in enumerate(items):
+            for id_b, mask_b in items[i + 1:]:
+                diff = id_a ^ id_b
+                if mask_a == mask_b and diff & (diff - 1) == 0:
+                    merged.add((id_a & ~diff, mask_a & ~diff))
+                    used.update(((id_a, mask_a), (id_b, mask_b)))
+        if not merged:
+            return sorted(current)
+        current = (current - used) | merged
+
+
+def _merge_lossy(filters: List[Filter], max_filters: int) -> List[Filter]:
+    """
+    Merges the pairs that widen the accepted id space the least until at most max_filters remain.
+    Extra frames accepted this way are discarded by the reader as unknown PGNs.
+    """
+    current = list(filters)
+    while len(current) > max_filters:
+        best = None
+        for i in range(len(current)):
+            for j in range(i + 1, len(current)):
+                (id_a, mask_a), (id_b, mask_b) = current[i], current[j]
+                mask = mask_a & mask_b & ~(id_a ^ id_b)
+                cost = bin(mask_a).count('1') + bin(mask_b).count('1') - 2 * bin(mask).count('1')
+                if best is None or cost < best[0]:
+                    best = (cost, i, j, (id_a & mask, mask))
+        _, i, j, merged = best
+        current = [f for k, f in enumerate(current) if k not in (i, j)] + [merged]
+    return sorted(current)
+
+
+def can_filters(registry: SignalRegistry, merge: bool = False, max_filters: Optional[int] = None,
+                extra_pgns: Iterable[int] = ()) -> List[Dict]:
+    """
+    Returns python-can acceptance filters for the PGNs of the configured signals.
+    merge: combine the filters into a minimal set of id/mask pairs accepting the same identifiers
+    max_filters: widen the filters further until at most this many remain (hardware filter banks are limited)
+    """
+    filters = sorted({pgn_filter(pgn) for pgn in (*registry.pgns(), *extra_pgns)})
+    if merge or max_filters is not None:
+        filters = _merge_exact(filters)
+    if max_filters is not None and len(filters) > max_filters:
+        filters = _merge_lossy(filters, max_filters)
+    return [{'can_id': can_id, 'can_mask': can_mask, 'extended': True} for can_id, can_mask in filters]
@@ -0,0 +1,56 @@
+"""
+Streaming ingestion of recorded bus logs (candump .log, Vector .asc/.blf and every other format python-can reads)
+into the bulk decoder, with memory bounded by the chunk size regardless of the log size (requires numpy)
+"""
+from typing import Dict, Iterator, Optional, Tuple
+
+import can
+import numpy as np
+
+from can_sdk.bulk import SignalColumns, decode_frames
+from can_sdk.config import SignalRegistry, load_registry
+
+Batch = Tuple[np.ndarray, np.ndarray, np.ndarray]  # (arbitration_ids, timestamps, payloads)
+
+
+def read_batches(path: str, chunk_size: int = 65536) -> Iterator[Batch]:
+    """
+    Yields the frames of a log in chunks of up to chunk_size as (arbitration_ids, timestamps, (N, 8) payloads).
+    The arrays are views of buffers reused for the next chunk, copy them to keep them around.
+    Error and remote frames are skipped, as are standard (11-bit) frames which carry no J1939 PGN;
+    short payloads are padded with 0xff.
+    """
+    ids = np.empty(chunk_size, dtype=np.uint32)
+    timestamps = np.empty(chunk_size, dtype=np.float64)
+    payloads = np.empty((chunk_size, 8), dtype=np.uint8)
+    rows = payloads.reshape(-1)  # flat view for copying payload bytes
+
+    n = 0
+    # closed as well when the caller abandons the generator
+    with can.LogReader(path) as reader:
+        for msg in reader:
+            if msg.is_error_frame or msg.is_remote_frame or not msg.is_extended_id:
+                continue
+            ids[n] = msg.arbitration_id
+            timestamps[n] = msg.timestamp
+            data = msg.data
+            if len(data) != 8:
+                data = bytes(data[:8]).ljust(8, b'\xff')
+            rows[n * 8:n * 8 + 8] = np.frombuffer(data, dtype=np.uint8)
+            n += 1
+            if n == chunk_size:
+                yield ids, timestamps, payloads
+                n = 0
+    if n:
+        yield ids[:n], timestamps[:n], payloads[:n]
+
+
+def decode_log(path: str, registry: Optional[SignalRegistry] = None,
+               chunk_size: int = 65536) -> Iterator[Dict[int, SignalColumns]]:
+    """
+    Yields the configured signals decoded from each chunk of the log, keyed by signal id
+    """
+    if registry is None:
+        registry = load_registry()
+    for ids, timestamps, payloads in read_batches(path, chunk_size):
+        yield decode_frames(ids, timestamps, payloads, registry)
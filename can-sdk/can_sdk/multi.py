@@ -0,0 +1,197 @@
+import logging
+
+from typing import Any, Dict, Iterable, List, Optional
+
+from can_sdk.client import Connection, SignalWriter, _Client
+from can_sdk.codec import Number
+from can_sdk.config import CompiledSignal, SignalRegistry, load_registry
+from can_sdk.dispatch import Callback, Subscription
+from can_sdk.storage import LatestValues, SignalValue
+from can_sdk.timeseries import TimeSeriesStore
+
+logger = logging.getLogger('sdk')
+
+# Connection options MultiConnection sets for every bus
+_SHARED_OPTIONS = ('registry', 'latest', 'timeseries')
+
+
+class MultiConnection:
+    """
+    Connection to several CAN buses at once, e.g.
+
+        with MultiConnection({
+            'powertrain': dict(interface='pcan', channel='PCAN_USBBUS1', bitrate=250000),
+            'body': dict(interface='pcan', channel='PCAN_USBBUS2', bitrate=250000, record='body.capture'),
+        }) as client:
+            client.read(0)
+
+    Signals are routed to a bus by the "bus" key of their config entry, entries without one go to the default bus.
+    Every bus has its own Connection (reader thread, acceptance filters, transmit scheduler and bus load budget),
+    all readers decode into one shared latest value table.
+    """
+    def __init__(self, buses: Dict[str, Dict[str, Any]], default_bus: Optional[str] = None,
+                 timeseries: Optional[TimeSeriesStore] = None, registry: Optional[SignalRegistry] = None) -> None:
+        """
+        buses: Connection arguments (interface, channel, bitrate, settings and options) by bus name.
+               registry, latest and timeseries are set by the MultiConnection for every bus, and decoding can not be
+               offloaded because all buses decode into the shared latest value table; these options raise ValueError
+        default_bus: bus of the signals without a "bus" key (default: the first one)
+        timeseries: store the history of the signals of all buses is recorded into
+        """
+        if not buses:
+            raise ValueError("At least one bus is required")
+        for name, options in buses.items():
+            shared = [key for key in _SHARED_OPTIONS if key in options]
+            if shared:
+                raise ValueError(f"Bus {name!r}: {', '.join(shared)} can not be set per bus, "
+                                 f"the MultiConnection shares them between all buses")
+            if options.get('offload', getattr(options.get('settings'), 'offload', False)):
+                raise ValueError(f"Bus {name!r}: offloaded decoding is not available, "
+                                 f"all buses decode into the shared latest value table")
+        self.default_bus = default_bus if default_bus is not None else next(iter(buses))
+        if self.default_bus not in buses:
+            raise ValueError(f"Unknown default bus {self.default_bus!r}")
+
+        self._registry = registry if registry is not None else load_registry()
+        self.latest = LatestValues()
+        self.timeseries = timeseries
+
+        routed: Dict[str, List[CompiledSignal]] = {name: [] for name in buses}
+        for signal in self._registry:
+            bus = signal.bus if signal.bus is not None else self.default_bus
+            if bus in routed:
+                routed[bus].append(signal)
+            else:
+                logger.warning(f"Signal {signal.id} ({signal.name}) is on bus {bus!r} which is not connected")
+
+        self.connections: Dict[str, Connection] = {
+            name: Connection(**options, registry=self._registry.subset(routed[name]),
+                             latest=self.latest, timeseries=timeseries)
+            for name, options in buses.items()
+        }
+
+    def __enter__(self) -> '_MultiClient':
+        clients = {}
+        try:
+            for name, connection in self.connections.items():
+                clients[name] = connection.__enter__()
+        except BaseException:
+            for name in clients:
+                try:
+                    self.connections[name].__exit__(None, None, None)
+                except Exception as e:
+                    logger.error(f"Closing bus {name!r} failed: {e}")
+            raise
+        return _MultiClient(clients, self.latest, self.timeseries)
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        # every bus is closed even if closing another one failed, the first error is raised afterwards
+        error = None
+        for name, connection in self.connections.items():
+            try:
+                connection.__exit__(exc_type, exc_value, traceback)
+            except Exception as e:
+                logger.error(f"Closing bus {name!r} failed: {e}")
+                if error is None:
+                    error = e
+        if error is not None:
+            raise error
+
+
+class SubscriptionGroup:
+    """
+    Subscriptions of one subscribe call spread over several buses
+    """
+    def __init__(self, subscriptions: List[Subscription]) -> None:
+        self.subscriptions = subscriptions
+
+    def cancel(self) -> None:
+        for subscription in self.subscriptions:
+            subscription.cancel()
+
+
+class _MultiClient:
+    """
+    Client of a MultiConnection, routes every call to the client of the bus carrying the signal
+    """
+    def __init__(self, clients: Dict[str, _Client], latest: LatestValues, timeseries: Optional[TimeSeriesStore] = None):
+        self.clients = clients
+        self._latest = latest
+        self._timeseries = timeseries
+        self._routes: Dict[int, _Client] = {
+            signal.id: client for client in clients.values() for signal in client._registry
+        }
+
+    def _route(self, index: int) -> _Client:
+        client = self._routes.get(index)
+        if client is None:
+            raise KeyError(f"Signal {index} is not carried by a connected bus")
+        return client
+
+    def client(self, bus: str) -> _Client:
+        """Returns the client of a single bus"""
+        return self.clients[bus]
+
+    def read(self, index: int) -> Optional[Number]:
+        """
+        Returns the last received physical value for given index
+        """
+        latest = self._latest.get(index)
+        return latest.value if latest is not None else None
+
+    def read_latest(self, index: int) -> Optional[SignalValue]:
+        """
+        Returns the last received value for given index with its timestamp and sequence number
+        (sequence numbers count the frames of the signal's own bus)
+        """
+        return self._latest.get(index)
+
+    def history(self, index: int, start: float = float('-inf'), end: float = float('inf')):
+        """
+        Returns (timestamps, values) arrays of the given index received within [start, end]
+        """
+        if self._timeseries is None:
+            raise RuntimeError("Connection was created without a timeseries store")
+        return self._timeseries.range(index, start, end)
+
+    def read_message(self, pgn: int, source_address: Optional[int] = None):
+        """
+        Returns the newest message of the PGN received with the transport protocol on any bus, see _Client.read_message.
+        Buses connected without transport protocol reassembly are skipped.
+        """
+        clients = [client for client in self.clients.values() if client._reader.transport is not None]
+        if not clients:
+            raise RuntimeError("No bus was connected with transport protocol reassembly")
+        messages = [client.read_message(pgn, source_address) for client in clients]
+        return max((m for m in messages if m is not None), key=lambda m: m.timestamp, default=None)
+
+    def subscribe(self, signal_ids: Iterable[int], callback: Callback,
+                  min_interval: Optional[float] = None, on_change_only: bool = False) -> SubscriptionGroup:
+        """
+        Calls callback(signal_id, SignalValue) from the reader thread of the signal's bus, see _Client.subscribe
+        """
+        by_client: Dict[int, List[int]] = {}
+        clients = {}
+        for signal_id in signal_ids:
+            client = self._route(signal_id)
+            clients[id(client)] = client
+            by_client.setdefault(id(client), []).append(signal_id)
+        return SubscriptionGroup([
+            clients[key].subscribe(ids, callback, min_interval, on_change_only) for key, ids in by_client.items()
+        ])
+
+    def write(self, index: int, value: int) -> bool:
+        """
+        Writes a value to the given index on the bus carrying it
+        """
+        return self._route(index).write(index, value)
+
+    def writer(self, index: int, immediate: bool = False) -> SignalWriter:
+        return self._route(index).writer(index, immediate)
+
+    def receiving(self, target_id: int, value: int, kind: str):
+        if kind == "rx":
+            self.write(target_id, value)
+        elif kind == "tx":
+            return self.read(target_id)
+        return None
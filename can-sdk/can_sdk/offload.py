@@ -0,0 +1,295 @@
+"""
+Decoding in a separate process, for bus rates the reader thread cannot decode within its share of the GIL.
+
+The reader thread only copies every received frame into a shared memory ring (FrameRing). A worker process
+decodes the frames and publishes the latest value, timestamp, frame sequence number, update count and min/max
+of every signal into a shared memory table (SharedLatestValues) that is read without locking.
+"""
+import logging
+import multiprocessing
+import struct
+import threading
+import time
+
+from multiprocessing import shared_memory
+from typing import Dict, NamedTuple, Optional
+
+from can_sdk.capture import EXTENDED_FLAG, RECORD
+from can_sdk.client import CANBusReader
+from can_sdk.codec import word_of
+from can_sdk.config import FrameValueKind, SignalRegistry, pgn_of
+from can_sdk.storage import SignalValue
+from can_sdk.transport import TP_CM, TP_DT, TransportReassembler
+
+logger = logging.getLogger('sdk')
+
+_INDEX = struct.Struct('<Q')
+RING_HEADER = 128  # write index at 0, read index at 64 and dropped frame count at 72, on separate cache lines
+_WRITE, _READ, _DROPPED = 0, 64, 72
+
+# version (odd while the slot is written), value, timestamp, seq, count, min, max
+_SLOT = struct.Struct('<QddqQdd')
+_SLOT_DATA = struct.Struct('<ddqQdd')
+
+
+def _attach(name: str) -> shared_memory.SharedMemory:
+    """Attaches to a segment created by the parent process, which stays responsible for unlinking it"""
+    try:
+        return shared_memory.SharedMemory(name, track=False)
+    except TypeError:
+        # Python < 3.13 registers attached segments with the resource tracker, which is shared with the parent
+        # (so the registration is the parent's one and removed when it unlinks the segment)
+        return shared_memory.SharedMemory(name)
+
+
+class FrameRing:
+    """
+    Single producer single consumer ring of received frames in shared memory (records as in can_sdk.capture).
+    The producer never blocks, when the consumer falls more than capacity - 1 frames behind the oldest frames are dropped.
+    """
+    def __init__(self, capacity: int = 65536, name: Optional[str] = None) -> None:
+        self.capacity = capacity
+        if name is None:
+            self.shm = shared_memory.SharedMemory(create=True, size=RING_HEADER + capacity * RECORD.size)
+            self.shm.buf[:RING_HEADER] = bytes(RING_HEADER)
+            self.owner = True
+        else:
+            self.shm = _attach(name)
+            self.owner = False
+        self.name = self.shm.name
+        self.buf = self.shm.buf
+        self._write = _INDEX.unpack_from(self.buf, _WRITE)[0]
+        self._pack_record = RECORD.pack_into
+        self._pack_index = _INDEX.pack_into
+
+    def put(self, timestamp: float, arbitration_id: int, data: bytes, is_extended_id: bool = True) -> None:
+        """Producer side, called by the reader thread for every frame"""
+        index = self._write
+        dlc = len(data)
+        if dlc != 8:
+            data = bytes(data[:8]).ljust(8, b'\xff')
+        self._pack_record(self.buf, RING_HEADER + index % self.capacity * RECORD.size, timestamp,
+                          arbitration_id | EXTENDED_FLAG if is_extended_id else arbitration_id, dlc, data)
+        # publish the record after it was written
+        self._write = index + 1
+        self._pack_index(self.buf, _WRITE, index + 1)
+
+    def take(self, read: int):
+        """
+        Consumer side, returns (first index, records) of the frames written since read.
+        Records overwritten while they were copied are dropped.
+        """
+        write = _INDEX.unpack_from(self.buf, _WRITE)[0]
+        if write == read:
+            return write, b''
+        first = max(read, write - self.capacity)
+        start, end = first % self.capacity, write % self.capacity
+        if start < end:
+            records = bytes(self.buf[RING_HEADER + start * RECORD.size:RING_HEADER + end * RECORD.size])
+        else:
+            records = (bytes(self.buf[RING_HEADER + start * RECORD.size:RING_HEADER + self.capacity * RECORD.size])
+                       + bytes(self.buf[RING_HEADER:RING_HEADER + end * RECORD.size]))
+        # the producer may have overwritten the oldest records while copying them (including the record it is
+        # writing but has not published yet)
+        valid = max(first, _INDEX.unpack_from(self.buf, _WRITE)[0] + 1 - self.capacity)
+        if valid > first:
+            records = records[(valid - first) * RECORD.size:]
+        dropped = valid - read
+        if dropped:
+            _INDEX.pack_into(self.buf, _DROPPED, _INDEX.unpack_from(self.buf, _DROPPED)[0] + dropped)
+        _INDEX.pack_into(self.buf, _READ, write)
+        return valid, records
+
+    def stats(self) -> Dict[str, int]:
+        write, = _INDEX.unpack_from(self.buf, _WRITE)
+        read, = _INDEX.unpack_from(self.buf, _READ)
+        dropped, = _INDEX.unpack_from(self.buf, _DROPPED)
+        return {'written': write, 'pending': write - read, 'dropped': dropped}
+
+    def close(self) -> None:
+        self.buf = None
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+
+
+class SignalAggregate(NamedTuple):
+    count: int
+    min: float
+    max: float
+
+
+class SharedLatestValues:
+    """
+    Latest value table in shared memory with one slot per signal of the registry, guarded by a per-slot seqlock:
+    the worker makes the slot version odd while writing it, readers retry until they read the same even version
+    before and after the data. Drop-in for can_sdk.storage.LatestValues on the reading side.
+    """
+    def __init__(self, registry: SignalRegistry, name: Optional[str] = None) -> None:
+        self.registry = registry
+        self.slots: Dict[int, int] = {signal.id: position * _SLOT.size for position, signal in enumerate(registry)}
+        self.binary = {signal.id for signal in registry if signal.kind == FrameValueKind.BINARY}
+        if name is None:
+            self.shm = shared_memory.SharedMemory(create=True, size=max(1, len(registry)) * _SLOT.size)
+            self.shm.buf[:] = bytes(self.shm.size)
+            self.owner = True
+        else:
+            self.shm = _attach(name)
+            self.owner = False
+        self.name = self.shm.name
+        self.buf = self.shm.buf
+
+    def _read(self, signal_id: int):
+        offset = self.slots.get(signal_id)
+        if offset is None:
+            return None
+        buf = self.buf
+        while True:
+            version, value, timestamp, seq, count, low, high = _SLOT.unpack_from(buf, offset)
+            if version == 0:
+                return None
+            if not version & 1 and _INDEX.unpack_from(buf, offset)[0] == version:
+                return value, timestamp, seq, count, low, high
+
+    def get(self, signal_id: int) -> Optional[SignalValue]:
+        slot = self._read(signal_id)
+        if slot is None:
+            return None
+        value, timestamp, seq = slot[:3]
+        return SignalValue(int(value) if signal_id in self.binary else value, timestamp, seq)
+
+    def aggregate(self, signal_id: int) -> Optional[SignalAggregate]:
+        """Number of updates and min/max value of a signal since the worker started"""
+        slot = self._read(signal_id)
+        return SignalAggregate(*slot[3:]) if slot is not None else None
+
+    def close(self) -> None:
+        self.buf = None
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+
+
+def _decode_worker(ring_name: str, capacity: int, table_name: str, registry: SignalRegistry, stop, idle: float,
+                   transport: bool = True) -> None:
+    """Worker process: decodes the frames of the ring (and reassembled transport protocol messages) into the latest value table"""
+    ring = FrameRing(capacity, ring_name)
+    table = SharedLatestValues(registry, table_name)
+    buf = table.buf
+    pack_version, pack_data = _INDEX.pack_into, _SLOT_DATA.pack_into
+    frame_from = registry.frame_from
+    slots = {frame: tuple(table.slots[s.id] for s in frame.signals) for frame in registry.frames()}
+    state = {offset: [0, 0, float('inf'), float('-inf')] for offset in table.slots.values()}  # version, count, min, max
+    reassembler = TransportReassembler(registry.pgns()) if transport else None
+
+    read = 0
+    try:
+        while not stop.is_set():
+            first, records = ring.take(read)
+            read = first + len(records) // RECORD.size
+            if not records:
+                time.sleep(idle)
+                continue
+            seq = first
+            for timestamp, identifier, dlc, data in RECORD.iter_unpack(records):
+                seq += 1
+                if not identifier & EXTENDED_FLAG:
+                    continue  # standard frame, J1939 signals are carried by 29-bit identifiers only
+                pgn = pgn_of(identifier & ~EXTENDED_FLAG)
+                frame = frame_from(pgn, identifier & 0xff)
+                if frame is not None:
+                    # short frames are padded with ones in the record already
+                    word = int.from_bytes(data, 'big')
+                elif reassembler is not None and (pgn == TP_CM or pgn == TP_DT):
+                    message = reassembler.receive(identifier & ~EXTENDED_FLAG, timestamp, data[:dlc])
+                    if message is None:
+                        continue
+                    frame = frame_from(message.pgn, message.source_address)
+                    if frame is None:
+                        continue
+                    word = word_of(message.data)
+                else:
+                    continue
+                for offset, value in zip(slots[frame], frame.decode_word(word)):
+                    slot = state[offset]
+                    slot[0] += 2
+                    slot[1] += 1
+                    if value < slot[2]:
+                        slot[2] = value
+                    if value > slot[3]:
+                        slot[3] = value
+                    pack_version(buf, offset, slot[0] - 1)
+                    pack_data(buf, offset + 8, value, timestamp, seq, slot[1], slot[2], slot[3])
+                    pack_version(buf, offset, slot[0])
+    finally:
+        table.close()
+        ring.close()
+
+
+class OffloadCANBusReader(CANBusReader):
+    """
+    CANBusReader that only copies frames into a FrameRing, decoding happens in a worker process.
+    latest is a SharedLatestValues table; subscriptions are served by a polling thread (every poll_interval seconds,
+    so consecutive values of a signal within one interval are coalesced). Frames are not kept for get_messages.
+    Transport protocol messages are reassembled by the worker as well, their payloads are not available to read_message.
+    The worker process is spawned, scripts using it need the usual `if __name__ == '__main__':` guard.
+    """
+    def __init__(self, bus, registry: Optional[SignalRegistry] = None, capture=None,
+                 capacity: int = 65536, poll_interval: float = 0.01, idle: float = 0.0005, transport: bool = True):
+        super().__init__(bus, 0, None, registry, capture)
+        self.ring = FrameRing(capacity)
+        self.latest = SharedLatestValues(self.registry)
+        self.poll_interval = poll_interval
+        self._put = self.ring.put
+        # spawned rather than forked, the parent already runs the transmit scheduler and other threads
+        context = multiprocessing.get_context('spawn')
+        self._stop = context.Event()
+        self.worker = context.Process(
+            target=_decode_worker, name='can_sdk-decode', daemon=True,
+            args=(self.ring.name, capacity, self.latest.name, self.registry, self._stop, idle, transport),
+        )
+        self.poll_thread = threading.Thread(target=self._poll, daemon=True)
+
+    def start(self):
+        self.worker.start()
+        self.running = True
+        self.read_thread.start()
+        self.poll_thread.start()
+
+    def stop(self):
+        self.running = False
+        self.read_thread.join()
+        self.poll_thread.join()
+        self._stop.set()
+        self.worker.join(5)
+        if self.worker.is_alive():
+            self.worker.terminate()
+        self.latest.close()
+        self.ring.close()
+
+    def _handle_frame(self, arbitration_id: int, timestamp: float, data: bytes, is_extended_id: bool = True):
+        if self.capture is not None:
+            self.capture.write(timestamp, arbitration_id, data, is_extended_id)
+        self._put(timestamp, arbitration_id, data, is_extended_id)
+
+    def _poll(self):
+        """Delivers values to subscribers, at most once per frame sequence number and poll interval"""
+        delivered: Dict[int, int] = {}  # {pgn: newest seq delivered}
+        get = self.latest.get
+        while self.running:
+            for pgn in self.dispatcher.pgns():
+                frame = self.registry.frame(pgn)
+                last = delivered.get(pgn, -1)
+                # only the values decoded since the last poll, signals pinned to different senders update separately
+                values = [get(signal.id) for signal in frame.signals]
+                values = [v if v is not None and v.seq > last else None for v in values]
+                fresh = [v.seq for v in values if v is not None]
+                if not fresh:
+                    continue
+                delivered[pgn] = max(fresh)
+                self.dispatcher.dispatch_latest(frame, values)
+            time.sleep(self.poll_interval)
+
+    def stats(self) -> Dict[str, int]:
+        """Frames written to the ring, not decoded yet and dropped because the worker fell behind"""
+        return self.ring.stats()
@@ -0,0 +1,148 @@
+import heapq
+import logging
+import threading
+import time
+
+from typing import Dict, List, Optional, Sequence, Union
+
+import can
+
+logger = logging.getLogger('sdk')
+
+
+class ScheduledFrame:
+    """
+    Periodic frame handled by a TransmitScheduler, offers the same modify_data/stop interface as python-can's periodic tasks
+    """
+    __slots__ = ('scheduler', 'message', 'period', 'phase', 'start', 'cycle', 'active',
+                 'sent', 'skipped', 'jitter_sum', 'jitter_max')
+
+    def __init__(self, scheduler: 'TransmitScheduler', message: can.Message, period: float, phase: float) -> None:
+        self.scheduler = scheduler
+        self.message = message
+        self.period = period
+        self.phase = phase
+        self.start = 0.0  # deadline of cycle 0, deadlines are start + cycle * period so they never drift
+        self.cycle = 0
+        self.active = True
+
+        self.sent = 0
+        self.skipped = 0  # cycles dropped because the scheduler fell behind by more than a period
+        self.jitter_sum = 0.0
+        self.jitter_max = 0.0
+
+    def modify_data(self, messages: Union[can.Message, Sequence[can.Message]]) -> None:
+        """Replaces the payload sent from the next cycle on, the schedule is not affected"""
+        self.message = messages if isinstance(messages, can.Message) else messages[0]
+
+    def stop(self) -> None:
+        self.scheduler.remove(self)
+
+    def deadline(self) -> float:
+        return self.start + self.cycle * self.period
+
+    def stats(self) -> dict:
+        return {
+            'period': self.period,
+            'phase': self.phase,
+            'sent': self.sent,
+            'skipped': self.skipped,
+            'jitter_mean': self.jitter_sum / self.sent if self.sent else 0.0,
+            'jitter_max': self.jitter_max,
+        }
+
+
+class TransmitScheduler:
+    """
+    Sends all periodic frames from a single thread.
+    Frames are kept in a heap ordered by their next absolute deadline, the thread sleeps until the earliest one.
+    """
+    def __init__(self, bus: can.BusABC) -> None:
+        self.bus = bus
+        self.frames: List[ScheduledFrame] = []
+        self._heap = []  # [(deadline, sequence, frame)]
+        self._sequence = 0
+        self._condition = threading.Condition()
+        self._running = False
+        self._thread = threading.Thread(target=self._run, daemon=True, name='can-sdk-tx')
+
+    def start(self) -> None:
+        self._running = True
+        self._thread.start()
+
+    def stop(self) -> None:
+        with self._condition:
+            self._running = False
+            self._condition.notify()
+        if self._thread.is_alive():
+            self._thread.join()
+
+    def send_periodic(self, message: can.Message, period: float, phase: float = 0.0) -> ScheduledFrame:
+        """
+        Starts sending the message every period seconds, the first one phase seconds from now
+        """
+        frame = ScheduledFrame(self, message, period, phase)
+        with self._condition:
+            frame.start = time.perf_counter() + phase
+            self.frames.append(frame)
+            self._push(frame)
+            self._condition.notify()
+        return frame
+
+    def remove(self, frame: ScheduledFrame) -> None:
+        with self._condition:
+            frame.active = False  # entries of inactive frames are dropped when they reach the top of the heap
+            if frame in self.frames:
+                self.frames.remove(frame)
+
+    def stats(self) -> Dict[int, dict]:
+        """Transmission statistics per arbitration ID, jitter in seconds"""
+        with self._condition:
+            return {frame.message.arbitration_id: frame.stats() for frame in self.frames}
+
+    def _push(self, frame: ScheduledFrame) -> None:
+        self._sequence += 1
+        heapq.heappush(self._heap, (frame.deadline(), self._sequence, frame))
+
+    def _next_due(self) -> Optional[ScheduledFrame]:
+        """Waits until the earliest deadline, returns its frame already rescheduled for the next cycle"""
+        with self._condition:
+            while self._running:
+                if not self._heap:
+                    self._condition.wait()
+                    continue
+                deadline, _, frame = self._heap[0]
+                if not frame.active:
+                    heapq.heappop(self._heap)
+                    continue
+                now = time.perf_counter()
+                if deadline > now:
+                    self._condition.wait(deadline - now)
+                    continue
+
+                heapq.heappop(self._heap)
+                late = now - deadline
+                frame.cycle += 1
+                if late > frame.period:
+                    # Fell behind by whole cycles, skip them instead of sending a burst
+                    missed = int(late / frame.period)
+                    frame.cycle += missed
+                    frame.skipped += missed
+                self._push(frame)
+
+                frame.sent += 1
+                frame.jitter_sum += late
+                if late > frame.jitter_max:
+                    frame.jitter_max = late
+                return frame
+            return None
+
+    def _run(self) -> None:
+        while True:
+            frame = self._next_due()
+            if frame is None:
+                return
+            try:
+                self.bus.send(frame.message)
+            except can.CanError:
+                logger.exception(f"Periodic message {frame.message.arbitration_id:#x} NOT sent")
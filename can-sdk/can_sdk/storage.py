@@ -0,0 +1,105 @@
+from array import array
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+from can_sdk.codec import Number
+
+Record = Tuple[float, int, bytes]  # (timestamp, dlc, 8 byte payload)
+
+
+class MessageRing:
+    """
+    Fixed-capacity ring buffer of the frames received with one arbitration id.
+    Records are kept in preallocated arrays (timestamp, dlc, 8 byte payload), the oldest record is overwritten
+    when the ring is full and records older than max_age seconds (relative to the newest one) are dropped on append,
+    so eviction is O(1) amortized and no periodic sweep is needed.
+    """
+    __slots__ = ('capacity', 'max_age', 'is_extended_id', 'timestamps', 'dlcs', 'payloads', 'head', 'count')
+
+    def __init__(self, capacity: int, max_age: Optional[float] = None, is_extended_id: bool = True) -> None:
+        if capacity <= 0:
+            raise ValueError("capacity must be positive")
+        self.capacity = capacity
+        self.max_age = max_age
+        self.is_extended_id = is_extended_id
+
+        self.timestamps = array('d', bytes(8 * capacity))
+        self.dlcs = bytearray(capacity)
+        self.payloads = bytearray(8 * capacity)
+        self.head = 0  # index the next record is written to
+        self.count = 0
+
+    def __len__(self) -> int:
+        return self.count
+
+    def append(self, timestamp: float, data: bytes) -> None:
+        i = self.head
+        self.timestamps[i] = timestamp
+        dlc = len(data)
+        self.dlcs[i] = dlc
+        if dlc == 8:
+            self.payloads[i * 8:i * 8 + 8] = data
+        else:
+            self.payloads[i * 8:i * 8 + 8] = bytes(data[:8]).ljust(8, b'\xff')
+
+        i += 1
+        self.head = 0 if i == self.capacity else i
+        if self.count < self.capacity:
+            self.count += 1
+
+        if self.max_age is not None:
+            self.evict_older_than(timestamp - self.max_age)
+
+    def _oldest(self) -> int:
+        i = self.head - self.count
+        return i + self.capacity if i < 0 else i
+
+    def evict_older_than(self, timestamp: float) -> None:
+        """Drops records older than the given timestamp, starting from the oldest"""
+        while self.count and self.timestamps[self._oldest()] < timestamp:
+            self.count -= 1
+
+    def latest(self) -> Optional[Record]:
+        if not self.count:
+            return None
+        i = self.head - 1 if self.head else self.capacity - 1
+        return self.timestamps[i], self.dlcs[i], bytes(self.payloads[i * 8:i * 8 + 8])
+
+    def records(self) -> List[Record]:
+        """Returns stored records, oldest first"""
+        start = self._oldest()
+        result = []
+        for n in range(self.count):
+            i = (start + n) % self.capacity
+            result.append((self.timestamps[i], self.dlcs[i], bytes(self.payloads[i * 8:i * 8 + 8])))
+        return result
+
+
+class SignalValue(NamedTuple):
+    value: Number
+    timestamp: float
+    seq: int  # sequence number of the frame the value was decoded from, increases with every received frame
+
+
+class LatestValues:
+    """
+    Latest decoded value of every signal, keyed by signal id.
+    Written by reader threads only: one reader, or with can_sdk.multi one per bus, each decoding its own signals
+    (a signal is routed to exactly one bus, so no entry has two writers). Every update replaces the whole immutable
+    SignalValue entry (a single atomic dict store), so readers never take a lock and never see a torn value.
+    Sequence numbers are counted per reader, they are only comparable between signals of the same bus.
+    """
+    __slots__ = ('_values',)
+
+    def __init__(self) -> None:
+        self._values: Dict[int, SignalValue] = {}
+
+    def update(self, signals: Sequence, values: Sequence[Number], timestamp: float, seq: int) -> None:
+        store = self._values
+        for signal, value in zip(signals, values):
+            store[signal.id] = SignalValue(value, timestamp, seq)
+
+    def get(self, signal_id: int) -> Optional[SignalValue]:
+        return self._values.get(signal_id)
+
+    def clear(self) -> None:
+        self._values = {}
@@ -0,0 +1,129 @@
+import threading
+
+from array import array
+from bisect import bisect_left, bisect_right
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+from can_sdk.codec import Number
+
+
+class Bucket(NamedTuple):
+    start: float
+    min: float
+    max: float
+    mean: float
+    count: int
+
+
+class SignalSeries:
+    """
+    History of one signal as timestamp/value columns stored in fixed-size array('d') chunks.
+    Appending never copies existing data and retention drops whole chunks from the front.
+    Timestamps are expected in non-decreasing order (as frames are received).
+    """
+    def __init__(self, chunk_size: int = 4096, max_age: Optional[float] = None, max_points: Optional[int] = None) -> None:
+        self.chunk_size = chunk_size
+        self.max_age = max_age
+        self.max_points = max_points
+        self._chunks: List[Tuple[array, array]] = []  # [(timestamps, values)]
+        self._count = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return self._count
+
+    def append(self, timestamp: float, value: Number) -> None:
+        with self._lock:
+            if not self._chunks or len(self._chunks[-1][0]) == self.chunk_size:
+                self._chunks.append((array('d'), array('d')))
+                self._apply_retention(timestamp)
+            timestamps, values = self._chunks[-1]
+            timestamps.append(timestamp)
+            values.append(value)
+            self._count += 1
+
+    def _apply_retention(self, newest: float) -> None:
+        """Drops full chunks that are entirely older than max_age or beyond max_points"""
+        while len(self._chunks) > 1:
+            timestamps = self._chunks[0][0]
+            too_old = self.max_age is not None and timestamps[-1] < newest - self.max_age
+            too_many = self.max_points is not None and self._count - len(timestamps) >= self.max_points
+            if not (too_old or too_many):
+                break
+            self._chunks.pop(0)
+            self._count -= len(timestamps)
+
+    def _slices(self, start: float, end: float):
+        """(timestamps, values, i, j) of every chunk overlapping [start, end]"""
+        for timestamps, values in self._chunks:
+            if not timestamps or timestamps[-1] < start:
+                continue
+            if timestamps[0] > end:
+                break
+            yield timestamps, values, bisect_left(timestamps, start), bisect_right(timestamps, end)
+
+    def range(self, start: float = float('-inf'), end: float = float('inf')) -> Tuple[array, array]:
+        """Timestamps and values within [start, end]"""
+        result_ts, result_values = array('d'), array('d')
+        with self._lock:
+            for timestamps, values, i, j in self._slices(start, end):
+                result_ts.extend(timestamps[i:j])
+                result_values.extend(values[i:j])
+        return result_ts, result_values
+
+    def downsample(self, start: float, end: float, buckets: int) -> List[Bucket]:
+        """
+        Splits [start, end) into equally long buckets and returns min/max/mean of each non-empty one (for plotting)
+        """
+        width = (end - start) / buckets
+        bounds = [start + k * width for k in range(buckets + 1)]
+        acc: Dict[int, List[float]] = {}  # {bucket: [min, max, sum, count]}
+        with self._lock:
+            for timestamps, values, i, j in self._slices(start, end):
+                if i == j:
+                    continue
+                for k in range(max(0, int((timestamps[i] - start) // width)), buckets):
+                    lo = max(i, bisect_left(timestamps, bounds[k], i, j))
+                    hi = bisect_left(timestamps, bounds[k + 1], lo, j)
+                    if lo < hi:
+                        part = values[lo:hi]
+                        entry = acc.get(k)
+                        if entry is None:
+                            acc[k] = [min(part), max(part), sum(part), hi - lo]
+                        else:
+                            entry[0] = min(entry[0], min(part))
+                            entry[1] = max(entry[1], max(part))
+                            entry[2] += sum(part)
+                            entry[3] += hi - lo
+                    if hi == j:
+                        break
+        return [Bucket(bounds[k], lo, hi, total / count, count) for k, (lo, hi, total, count) in sorted(acc.items())]
+
+
+class TimeSeriesStore:
+    """
+    Per-signal history fed by the reader thread, see SignalSeries for the storage and retention
+    """
+    def __init__(self, chunk_size: int = 4096, max_age: Optional[float] = 3600, max_points: Optional[int] = None) -> None:
+        self.chunk_size = chunk_size
+        self.max_age = max_age
+        self.max_points = max_points
+        self.series: Dict[int, SignalSeries] = {}
+
+    def record(self, signals: Sequence, values: Sequence[Number], timestamp: float) -> None:
+        for signal, value in zip(signals, values):
+            series = self.series.get(signal.id)
+            if series is None:
+                series = self.series[signal.id] = SignalSeries(self.chunk_size, self.max_age, self.max_points)
+            series.append(timestamp, value)
+
+    def get(self, signal_id: int) -> Optional[SignalSeries]:
+        return self.series.get(signal_id)
+
+    def range(self, signal_id: int, start: float = float('-inf'), end: float = float('inf')) -> Tuple[array, array]:
+        series = self.series.get(signal_id)
+        return series.range(start, end) if series is not None else (array('d'), array('d'))
+
+    def downsample(self, signal_id: int, start: float, end: float, buckets: int) -> List[Bucket]:
+        series = self.series.get(signal_id)
+        return series.downsample(start, end, buckets) if series is not None else []
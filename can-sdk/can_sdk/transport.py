@@ -0,0 +1,218 @@
+"""
+J1939 transport protocol (J1939-21): reassembly of messages longer than 8 bytes sent as TP.CM / TP.DT frames,
+either broadcast (BAM) or to one destination (CMDT, connection mode with RTS/CTS handshake).
+
+Reassembled messages are decoded like single frames by the reader (signals are defined on the first 8 bytes),
+the whole payload of the newest message per PGN and source address is kept for reading, e.g. the DTCs of DM1.
+"""
+import logging
+
+from typing import Callable, Dict, Iterable, NamedTuple, Optional, Tuple
+
+import can
+
+logger = logging.getLogger('sdk')
+
+TP_CM = 0xEC00  # connection management
+TP_DT = 0xEB00  # data transfer
+TRANSPORT_PGNS = (TP_CM, TP_DT)
+
+MAX_PACKET_SIZE = 1785  # 255 packets of 7 bytes
+GLOBAL_ADDRESS = 0xFF
+
+# TP.CM control bytes
+RTS, CTS, END_OF_MSG_ACK, BAM, ABORT = 16, 17, 19, 32, 255
+# abort reasons
+ABORT_RESOURCES, ABORT_TIMEOUT = 2, 3
+
+T1 = 0.75  # seconds between two data packets
+T2 = 1.25  # seconds between the announcement (or CTS) and the first data packet
+
+
+class TransportMessage(NamedTuple):
+    pgn: int
+    source_address: int
+    destination_address: int  # GLOBAL_ADDRESS for BAM
+    priority: int
+    timestamp: float  # of the last data packet
+    data: bytes
+
+
+class _Session:
+    """
+    Transfer in progress, the objects (with their MAX_PACKET_SIZE buffer) are allocated once and reused
+    """
+    __slots__ = ('buffer', 'pgn', 'priority', 'size', 'packets', 'received', 'complete', 'deadline',
+                 'window', 'window_end', 'respond')
+
+    def __init__(self) -> None:
+        self.buffer = bytearray(MAX_PACKET_SIZE)
+
+    def start(self, pgn: int, priority: int, size: int, packets: int, deadline: float,
+              window: int = 255, respond: bool = False) -> None:
+        self.pgn = pgn
+        self.priority = priority
+        self.size = size
+        self.packets = packets
+        self.received = 0  # bit n is set once packet n arrived, so retransmitted packets are simply written again
+        self.complete = ((1 << packets) - 1) << 1
+        self.deadline = deadline
+        self.window = window  # packets per CTS
+        self.window_end = 0  # last packet of the current CTS window
+        self.respond = respond
+
+
+class TransportReassembler:
+    """
+    Reassembles transport protocol transfers, called by the reader thread with every TP.CM and TP.DT frame.
+    Sessions are kept per (source, destination) address pair, so transfers of several nodes (and a broadcast and
+    a connection mode transfer of the same node) run concurrently. Up to max_sessions transfers are tracked at once,
+    their buffers are preallocated. Timeouts are measured with the frame timestamps.
+
+    pgns: only reassemble these PGNs (None: all), other transfers are ignored as they are announced
+    address: own source address, connection mode transfers to it are answered (CTS, acknowledgement, abort) via send;
+             without an address connection mode transfers between other nodes are only followed
+    """
+    def __init__(self, pgns: Optional[Iterable[int]] = None, address: Optional[int] = None,
+                 send: Optional[Callable[[can.Message], None]] = None, max_sessions: int = 32) -> None:
+        if address is not None and send is None:
+            raise ValueError("Answering connection mode transfers requires send")
+        self.pgns = frozenset(pgns) if pgns is not None else None
+        self.address = address
+        self.send = send
+        self._free = [_Session() for _ in range(max_sessions)]
+        self._sessions: Dict[Tuple[int, int], _Session] = {}  # {(source, destination): session}
+        self.messages: Dict[Tuple[int, int], TransportMessage] = {}  # {(pgn, source): newest message}
+        self.stats = {'completed': 0, 'aborted': 0, 'timed_out': 0, 'dropped': 0}
+
+    def receive(self, arbitration_id: int, timestamp: float, data: bytes) -> Optional[TransportMessage]:
+        """
+        Handles one TP.CM or TP.DT frame, returns the message it completed
+        """
+        source = arbitration_id & 0xff
+        destination = (arbitration_id >> 8) & 0xff
+        if (arbitration_id >> 8) & 0xff00 == TP_DT:
+            return self._data(source, destination, timestamp, data)
+        self._connection(source, destination, (arbitration_id >> 26) & 0x7, timestamp, data)
+        return None
+
+    def get(self, pgn: int, source_address: Optional[int] = None) -> Optional[TransportMessage]:
+        """
+        Newest message of the PGN from the given source address (from any source if None)
+        """
+        if source_address is not None:
+            return self.messages.get((pgn, source_address))
+        return max((m for (p, _), m in list(self.messages.items()) if p == pgn), key=lambda m: m.timestamp, default=None)
+
+    def _data(self, source: int, destination: int, timestamp: float, data: bytes) -> Optional[TransportMessage]:
+        key = (source, destination)
+        session = self._sessions.get(key)
+        if session is None:
+            return None  # transfer of an ignored PGN or that was never announced
+        if timestamp > session.deadline:
+            self._time_out(key, session)
+            return None
+        seq = data[0]
+        if not 0 < seq <= session.packets:
+            return None
+        offset = (seq - 1) * 7
+        chunk = data[1:8]
+        if len(chunk) != 7:
+            # short last packet, a shorter slice assignment would shrink the preallocated buffer
+            chunk = bytes(chunk).ljust(7, b'\xff')
+        session.buffer[offset:offset + 7] = chunk
+        session.received |= 1 << seq
+        session.deadline = timestamp + T1
+
+        if session.received == session.complete:
+            return self._finish(key, session, timestamp)
+        if session.respond and seq == session.window_end:
+            self._clear_to_send(key, session, timestamp)
+        return None
+
+    def _connection(self, source: int, destination: int, priority: int, timestamp: float, data: bytes) -> None:
+        if len(data) < 8:
+            return
+        control = data[0]
+        if control == BAM or control == RTS:
+            self._expire(timestamp)
+            pgn = data[5] | data[6] << 8 | data[7] << 16
+            size = data[1] | data[2] << 8
+            packets = data[3]
+            if control == BAM:
+                destination = GLOBAL_ADDRESS
+            key = (source, destination)
+            previous = self._sessions.pop(key, None)
+            if previous is not None:
+                # a new announcement replaces the unfinished transfer (its data packets use the same addresses)
+                self.stats['aborted'] += 1
+                self._free.append(previous)
+            respond = control == RTS and destination == self.address
+            if not respond and self.pgns is not None and pgn not in self.pgns:
+                return
+            if not 0 < size <= MAX_PACKET_SIZE or packets != (size + 6) // 7:
+                logger.debug(f"Invalid transport announcement from {source:#x}: {data.hex()}")
+                return
+            if not self._free:
+                self.stats['dropped'] += 1
+                logger.warning(f"No free transport session for PGN {pgn:#x} from {source:#x}")
+                if respond:
+                    self._abort(source, pgn, ABORT_RESOURCES)
+                return
+            session = self._free.pop()
+            session.start(pgn, priority, size, packets, timestamp + T2, data[4] or 255, respond)
+            self._sessions[key] = session
+            if respond:
+                self._clear_to_send(key, session, timestamp)
+        elif control == ABORT:
+            # sent by either side of a connection mode transfer
+            for key in ((source, destination), (destination, source)):
+                session = self._sessions.pop(key, None)
+                if session is not None:
+                    self.stats['aborted'] += 1
+                    self._free.append(session)
+
+    def _expire(self, now: float) -> None:
+        for key, session in list(self._sessions.items()):
+            if now > session.deadline:
+                self._time_out(key, session)
+
+    def _time_out(self, key: Tuple[int, int], session: _Session) -> None:
+        del self._sessions[key]
+        self.stats['timed_out'] += 1
+        if session.respond:
+            self._abort(key[0], session.pgn, ABORT_TIMEOUT)
+        self._free.append(session)
+
+    def _finish(self, key: Tuple[int, int], session: _Session, timestamp: float) -> TransportMessage:
+        del self._sessions[key]
+        message = TransportMessage(session.pgn, key[0], key[1], session.priority, timestamp,
+                                   bytes(session.buffer[:session.size]))
+        if session.respond:
+            self._control(key[0], END_OF_MSG_ACK, session.size & 0xff, session.size >> 8, session.packets, 0xff,
+                          session.pgn)
+        self._free.append(session)
+        self.messages[(message.pgn, message.source_address)] = message
+        self.stats['completed'] += 1
+        return message
+
+    def _clear_to_send(self, key: Tuple[int, int], session: _Session, timestamp: float) -> None:
+        """Requests the next window of packets (the ones after the last packet received in sequence)"""
+        first = 1
+        while session.received >> first & 1:
+            first += 1
+        count = min(session.window, session.packets - first + 1)
+        session.window_end = first + count - 1
+        session.deadline = timestamp + T2
+        self._control(key[0], CTS, count, first, 0xff, 0xff, session.pgn)
+
+    def _abort(self, destination: int, pgn: int, reason: int) -> None:
+        self._control(destination, ABORT, reason, 0xff, 0xff, 0xff, pgn)
+
+    def _control(self, destination: int, control: int, b1: int, b2: int, b3: int, b4: int, pgn: int) -> None:
+        arbitration_id = 7 << 26 | TP_CM << 8 | destination << 8 | self.address
+        data = bytes((control, b1, b2, b3, b4, pgn & 0xff, pgn >> 8 & 0xff, pgn >> 16 & 0xff))
+        try:
+            self.send(can.Message(arbitration_id=arbitration_id, data=data, is_extended_id=True))
+        except can.CanError:
+            logger.error("Transport protocol frame NOT sent")
@@ -0,0 +1,13 @@
+import os
+
+import pytest
+
+from can_sdk.config import load_registry
+
+CONFIG_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'config_system.json')
+
+
+@pytest.fixture(scope='session')
+def registry():
+    """Registry of the configuration shipped with the SDK"""
+    return load_registry(CONFIG_PATH, cache=False)
@@ -0,0 +1,21 @@
+import pytest
+
+np = pytest.importorskip('numpy')
+
+from can_sdk.bulk import decode_frames  # noqa: E402
+
+
+def test_decode_frames_matches_codec(registry):
+    rng = np.random.default_rng(0)
+    known = np.array([s.arbitration_id for s in registry], dtype=np.uint32)
+    ids = known[rng.integers(0, len(known), 5000)]
+    timestamps = np.arange(len(ids), dtype=np.float64) / 2000
+    payloads = rng.integers(0, 256, (len(ids), 8), dtype=np.uint8)
+
+    columns = decode_frames(ids, timestamps, payloads, registry)
+    for signal in registry:
+        rows = ids == signal.arbitration_id
+        index = registry.frame(signal.pgn).signals.index(signal)
+        expected = [registry.frame(signal.pgn).decode(bytes(p))[index] for p in payloads[rows]]
+        assert np.array_equal(columns[signal.id].timestamps, timestamps[rows])
+        assert np.allclose(columns[signal.id].values, expected, rtol=0, atol=1e-9)
@@ -0,0 +1,83 @@
+from types import SimpleNamespace
+
+import can
+import pytest
+
+from can_sdk.busload import BusLoadError, BusLoadPlanner, frame_bits
+from can_sdk.client import SendingTaskManager
+from can_sdk.codec import SignalCodec
+from can_sdk.scheduler import TransmitScheduler
+
+BITRATE = 250000
+ARBITRATION_ID = 0x18FF0080
+
+
+def _signal(signal_id: int, period: int, bit_index: int = 0) -> SimpleNamespace:
+    return SimpleNamespace(id=signal_id, arbitration_id=ARBITRATION_ID, period=period,
+                           codec=SignalCodec(bit_index, 8, False))
+
+
+def test_planner_spreads_phases():
+    planner = BusLoadPlanner(BITRATE)
+    phases = [planner.add(n, 10) for n in range(10)]
+    assert sorted(phases) == list(range(10))
+    # one frame per millisecond window
+    assert planner.peak() == frame_bits() / (BITRATE / 1000)
+
+    # a frame with a longer period goes between the others
+    assert planner.add('slow', 20) in range(10)
+    assert max(planner._windows) == 2 * frame_bits()
+
+
+def test_planner_phases_over_hyperperiod():
+    planner = BusLoadPlanner(BITRATE)
+    assert planner.add('a', 4) == 0
+    assert planner.add('b', 6) != 0
+    assert planner.add('c', 4) not in (0, planner.frames['b'][2])
+    assert planner.load() == pytest.approx(frame_bits() * (1000 / 4 * 2 + 1000 / 6) / BITRATE)
+
+    planner.remove('a')
+    assert set(planner.frames) == {'b', 'c'}
+    assert sum(planner._windows) == frame_bits() * (12 // 6 + 12 // 4)
+
+
+@pytest.fixture
+def manager():
+    with can.Bus(interface='virtual', channel='test_busload') as bus:
+        # frames are only scheduled, the thread is not started
+        yield SendingTaskManager(bus, TransmitScheduler(bus), BITRATE, max_load=0.1, on_overload='reject')
+
+
+def test_period_is_the_shortest_of_the_signals(manager):
+    slow, fast = _signal(0, 100), _signal(1, 20, bit_index=8)
+    manager.update_or_create_task(slow, 1)
+    manager.update_or_create_task(fast, 2)
+    frame = manager.active_tasks[ARBITRATION_ID]
+    assert (frame.period, frame.task.period, frame.values) == (20, 0.02, {0: 1, 1: 2})
+
+    # the same rule when all values are set at once
+    manager.update_tasks([(slow, 3), (fast, 4)])
+    assert manager.active_tasks[ARBITRATION_ID] is frame
+    assert (frame.period, frame.values) == (20, {0: 3, 1: 4})
+    assert manager.planner.frames[ARBITRATION_ID][0] == 20
+
+
+def test_rejected_period_leaves_frame_unchanged(manager):
+    slow, fast = _signal(0, 10), _signal(1, 5, bit_index=8)
+    manager.update_or_create_task(slow, 1)  # ~6% of the bus
+    frame = manager.active_tasks[ARBITRATION_ID]
+    task, word, reservation = frame.task, frame.word, manager.planner.frames[ARBITRATION_ID]
+
+    with pytest.raises(BusLoadError):
+        manager.update_or_create_task(fast, 2)  # twice as often exceeds 10%
+    assert (frame.task, frame.word, frame.period, frame.values) == (task, word, 10, {0: 1})
+    assert bytes(task.message.data) == word.to_bytes(8, 'big')
+    assert manager.planner.frames[ARBITRATION_ID] == reservation
+
+    with pytest.raises(BusLoadError):
+        manager.update_tasks([(slow, 3), (fast, 4)])
+    assert (frame.task, frame.word, frame.period, frame.values) == (task, word, 10, {0: 1})
+
+    # values at the accepted period are still applied
+    manager.update_or_create_task(slow, 5)
+    assert frame.word >> 56 == 5 and bytes(task.message.data)[0] == 5
@@ -0,0 +1,50 @@
+import gc
+
+import pytest
+
+from can_sdk.capture import CaptureReplay, CaptureWriter
+
+FRAMES = [
+    (0.5, 0x18FEEE00, b'\x50\x01\x02\x03\x04\x05\x06\x07', True),
+    (1.0, 0x7DF, b'\x02\x01\x0c', False),
+    (1.5, 0x0CF00400, bytes(range(8)), True),
+]
+
+
+@pytest.fixture
+def capture(tmp_path):
+    path = str(tmp_path / 'test.cap')
+    with CaptureWriter(path) as writer:
+        for timestamp, arbitration_id, data, extended in FRAMES:
+            writer.write(timestamp, arbitration_id, data, extended)
+    # a record cut short while recording
+    with open(path, 'ab') as file:
+        file.write(b'\x00' * 10)
+    return path
+
+
+def test_replay_frames(capture):
+    with CaptureReplay(capture) as replay:
+        assert len(replay) == len(FRAMES)
+        assert list(replay) == [(t, i, len(d), d, e) for t, i, d, e in FRAMES]
+
+
+def test_close_with_arrays_alive(capture):
+    np = pytest.importorskip('numpy')
+
+    replay = CaptureReplay(capture)
+    ids, timestamps, payloads, extended = replay.arrays()
+    replay.close()  # the views keep the file mapped
+    assert timestamps.tolist() == [t for t, _, _, _ in FRAMES]
+    assert ids.tolist() == [i for _, i, _, _ in FRAMES]
+    assert extended.tolist() == [e for _, _, _, e in FRAMES]
+    assert bytes(payloads[2]) == FRAMES[2][2]
+    assert np.all(payloads[1, 3:] == 0xff)
+    del ids, timestamps, payloads, extended
+    gc.collect()
+
+
+def test_close_releases_mapping(capture):
+    replay = CaptureReplay(capture)
+    replay.close()
+    assert replay._mmap.closed and replay._file.closed
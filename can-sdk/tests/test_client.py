@@ -0,0 +1,56 @@
+import threading
+
+import pytest
+
+from can_sdk import client as client_module
+from can_sdk.busload import BusLoadError
+from can_sdk.client import Connection, ConnectionSettings
+
+
+def _tx_threads():
+    return [t for t in threading.enumerate() if t.name == 'can-sdk-tx']
+
+
+def test_settings_and_options(registry):
+    settings = ConnectionSettings(record='bus.capture', transport=False)
+    connection = Connection('virtual', 'test_client', 250000, settings, registry=registry, max_filters=2)
+    assert connection.settings == settings._replace(max_filters=2)
+    assert len(connection.filters()) <= 2
+
+    with pytest.raises(ValueError):
+        Connection('virtual', 'test_client', 250000, registry=registry, unknown=True)
+    with pytest.raises(ValueError):
+        Connection('virtual', 'test_client', 250000, registry=registry, offload=True, address=0x80)
+
+
+def test_open_failure_stops_scheduler(registry):
+    connection = Connection('virtual', 'test_client', 250000, registry=registry,
+                            max_bus_load=0.0001, on_overload='reject')
+    with pytest.raises(BusLoadError):
+        connection.__enter__()
+    assert connection._bus._is_shutdown
+    assert not _tx_threads()
+
+
+def test_reader_failure_stops_everything(registry, monkeypatch, tmp_path):
+    def failing_start(self):
+        raise RuntimeError("reader failed")
+
+    monkeypatch.setattr(client_module.CANBusReader, 'start', failing_start)
+    connection = Connection('virtual', 'test_client', 250000, registry=registry, record=str(tmp_path / 'bus.capture'))
+    with pytest.raises(RuntimeError, match="reader failed"):
+        connection.__enter__()
+    assert connection.reader is None
+    assert connection.task_manager.active_tasks == {}
+    assert connection.capture._file.closed
+    assert connection._bus._is_shutdown
+    assert not _tx_threads()
+
+
+def test_capture_failure_closes_bus(registry, tmp_path):
+    connection = Connection('virtual', 'test_client', 250000, registry=registry,
+                            record=str(tmp_path / 'missing' / 'bus.capture'))
+    with pytest.raises(FileNotFoundError):
+        connection.__enter__()
+    assert connection._bus._is_shutdown
+    assert connection.scheduler is None
@@ -0,0 +1,44 @@
+import random
+
+import pytest
+
+from can_sdk.client import compute_frame_values
+
+PGNS = (0xF004, 0xFEEF, 0xFEEE, 0xFECA, 0x0)
+
+
+@pytest.mark.parametrize('pgn', PGNS)
+def test_encode_matches_compute_frame_values(registry, pgn):
+    """Random physical values encode to the frame words of compute_frame_values and decode back"""
+    frame = registry.frame(pgn)
+    values = [s.value for s in frame.signals]
+    rng = random.Random(pgn)
+    for _ in range(10000):
+        sent = [s.codec.to_physical(rng.randrange(s.codec.mask + 1)) for s in frame.signals]
+        word = frame.encode(sent)
+        assert word == compute_frame_values(values, sent)
+        for signal, value, decoded in zip(frame.signals, sent, frame.decode(word.to_bytes(8, 'big'))):
+            codec = signal.codec
+            # encoding truncates like compute_frame_values, so a value just below a step (float rounding of the
+            # physical value) comes back one step lower
+            resolution = abs(codec.factor / codec.scale) * (1 + 1e-9) if codec.analog else 0
+            assert abs(decoded - value) <= resolution, f"{signal.name}: {value} decoded as {decoded}"
+
+
+@pytest.mark.parametrize('pgn', PGNS)
+def test_decode_matches_unpack(registry, pgn):
+    frame = registry.frame(pgn)
+    rng = random.Random(pgn)
+    for _ in range(10000):
+        word = rng.getrandbits(64)
+        assert frame.decode_word(word) == [s.codec.unpack(word) for s in frame.signals]
+
+
+def test_encode_updates_word(registry):
+    """Only the bits of the frame's signals are replaced in a given word"""
+    frame = registry.frame(0xFECA)
+    clear = frame.codecs[0].clear & frame.codecs[1].clear
+    word = 0x0123456789abcdef
+    updated = frame.encode([3, 0], word)
+    assert updated & clear == word & clear
+    assert frame.decode_word(updated) == [3, 0]
@@ -0,0 +1,53 @@
+import os
+import shutil
+
+import pytest
+
+from can_sdk import config
+from can_sdk.config import load_registry
+
+from tests.conftest import CONFIG_PATH
+
+
+@pytest.fixture
+def config_path(tmp_path):
+    """Copy of the configuration, a new path is not in the in-memory cache yet"""
+    path = tmp_path / 'config' / 'config_system.json'
+    path.parent.mkdir()
+    shutil.copy(CONFIG_PATH, path)
+    return str(path)
+
+
+@pytest.fixture
+def cache_dir(tmp_path, monkeypatch):
+    directory = tmp_path / 'cache'
+    monkeypatch.setenv(config.CACHE_DIR_ENV, str(directory))
+    monkeypatch.delenv(config.NO_CACHE_ENV, raising=False)
+    return directory
+
+
+def test_cache_in_cache_dir(config_path, cache_dir):
+    registry = load_registry(config_path)
+    assert os.listdir(os.path.dirname(config_path)) == ['config_system.json']
+    [name] = os.listdir(cache_dir)
+    assert name.startswith('config_system.json.') and name.endswith('.cache')
+
+    cached = config._load_cached(os.path.abspath(config_path), config._registries[config_path][2])
+    assert [s.name for s in cached] == [s.name for s in registry]
+    assert cached.frame(0xF004).encode([1000.0]) == registry.frame(0xF004).encode([1000.0])
+
+
+@pytest.mark.parametrize('disable', ['argument', 'environment'])
+def test_cache_opt_out(config_path, cache_dir, monkeypatch, disable):
+    if disable == 'argument':
+        load_registry(config_path, cache=False)
+    else:
+        monkeypatch.setenv(config.NO_CACHE_ENV, '1')
+        load_registry(config_path)
+    assert not cache_dir.exists()
+
+
+def test_cache_write_failure_ignored(config_path, cache_dir):
+    cache_dir.write_text('not a directory')
+    registry = load_registry(config_path)
+    assert registry.frame(0xF004) is not None
@@ -0,0 +1,73 @@
+import random
+
+import pytest
+
+from can_sdk.filters import _merge_exact, _merge_lossy, can_filters, pgn_filter
+from can_sdk.transport import TRANSPORT_PGNS
+
+
+def _accepts(filters, arbitration_id: int) -> bool:
+    return any(arbitration_id & f['can_mask'] == f['can_id'] & f['can_mask'] for f in filters)
+
+
+def _pairs(filters):
+    return [{'can_id': can_id, 'can_mask': can_mask} for can_id, can_mask in filters]
+
+
+def _variants(arbitration_id: int, rng: random.Random, count: int = 20):
+    """The identifier with other priorities and source (and for PDU1 destination) addresses"""
+    yield arbitration_id
+    pdu1 = (arbitration_id >> 16) & 0xff < 240
+    for _ in range(count):
+        variant = (arbitration_id & 0x3ffff00) | rng.randrange(8) << 26 | rng.randrange(256)
+        if pdu1:
+            variant = (variant & ~0xff00) | rng.randrange(256) << 8
+        yield variant
+
+
+# PDU2 PGNs (some differing in single bits) and PDU1 PGNs
+PGNS = [0xF004, 0xF005, 0xF006, 0xFEEE, 0xFEEF, 0xFECA, 0xFEE5, 0x1FECA, 0x0, 0xEF00, 0xDA00, 0x10000]
+
+
+@pytest.mark.parametrize('max_filters', [None, 1, 2, 3, 5, 8])
+def test_configured_ids_pass(registry, max_filters):
+    filters = can_filters(registry, merge=True, max_filters=max_filters, extra_pgns=TRANSPORT_PGNS)
+    if max_filters is not None:
+        assert len(filters) <= max_filters
+    rng = random.Random(0)
+    for signal in registry:
+        for arbitration_id in _variants(signal.arbitration_id, rng):
+            assert _accepts(filters, arbitration_id), f"{arbitration_id:#x} of signal {signal.id} is filtered"
+    for pgn in TRANSPORT_PGNS:
+        assert _accepts(filters, 7 << 26 | pgn << 8 | 0x80 << 8 | 0x00)
+
+
+def test_merge_exact_accepts_the_same_ids():
+    filters = sorted({pgn_filter(pgn) for pgn in PGNS})
+    merged = _merge_exact(filters)
+    assert len(merged) < len(filters)
+    rng = random.Random(1)
+    ids = [pgn << 8 | rng.randrange(256) for pgn in PGNS for _ in range(10)]
+    ids += [rng.getrandbits(29) for _ in range(20000)]
+    # neighbours of the configured PGNs in every bit of the PGN
+    ids += [(pgn << 8) ^ (1 << bit) for pgn in PGNS for bit in range(8, 26)]
+    for arbitration_id in ids:
+        assert _accepts(_pairs(merged), arbitration_id) == _accepts(_pairs(filters), arbitration_id), \
+            f"{arbitration_id:#x}"
+
+
+@pytest.mark.parametrize('max_filters', range(1, 12))
+def test_merge_lossy_respects_max_filters(max_filters):
+    filters = sorted({pgn_filter(pgn) for pgn in PGNS})
+    merged = _merge_lossy(_merge_exact(filters), max_filters)
+    assert len(merged) <= max_filters
+    rng = random.Random(max_filters)
+    for pgn in PGNS:
+        for arbitration_id in _variants(pgn << 8, rng):
+            assert _accepts(_pairs(merged), arbitration_id)
+
+
+def test_no_merge_keeps_one_filter_per_pgn(registry):
+    filters = can_filters(registry)
+    assert len(filters) == len(set(registry.pgns()))
+    assert all(f['extended'] for f in filters)
@@ -0,0 +1,50 @@
+import can
+import pytest
+
+pytest.importorskip('numpy')
+
+from can_sdk import ingest  # noqa: E402
+
+
+@pytest.fixture
+def log(tmp_path):
+    path = str(tmp_path / 'test.log')
+    with can.Logger(path) as logger:
+        for n in range(5):
+            logger.on_message_received(can.Message(timestamp=n / 10, arbitration_id=0x18FEEE00 | n,
+                                                   data=bytes((n,)) * (8 if n % 2 else 3), is_extended_id=True))
+        logger.on_message_received(can.Message(timestamp=1.0, arbitration_id=0x7DF, data=b'\x02\x01\x0c',
+                                               is_extended_id=False))
+    return path
+
+
+@pytest.fixture
+def readers(monkeypatch):
+    """LogReaders opened by read_batches"""
+    opened = []
+    open_log = can.LogReader
+
+    def log_reader(path):
+        reader = open_log(path)
+        opened.append(reader)
+        return reader
+
+    monkeypatch.setattr(ingest.can, 'LogReader', log_reader)
+    return opened
+
+
+def test_read_batches(log):
+    batches = [tuple(a.copy() for a in batch) for batch in ingest.read_batches(log, chunk_size=2)]
+    assert [len(ids) for ids, _, _ in batches] == [2, 2, 1]
+    ids, timestamps, payloads = (sum((list(b[i]) for b in batches), []) for i in range(3))
+    assert ids == [0x18FEEE00 | n for n in range(5)]
+    assert timestamps == pytest.approx([n / 10 for n in range(5)])
+    assert bytes(payloads[0]) == b'\x00\x00\x00\xff\xff\xff\xff\xff'
+    assert bytes(payloads[1]) == b'\x01' * 8
+
+
+def test_abandoned_generator_closes_log(log, readers):
+    batches = ingest.read_batches(log, chunk_size=2)
+    next(batches)
+    batches.close()
+    assert readers[0].file.closed
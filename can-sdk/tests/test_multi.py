@@ -0,0 +1,69 @@
+import time
+
+import can
+import pytest
+
+from can_sdk.client import ConnectionSettings
+from can_sdk.multi import MultiConnection
+from can_sdk.transport import BAM, TP_CM, TP_DT
+
+
+def _buses(**options):
+    return {
+        'powertrain': dict(interface='virtual', channel='test_multi_powertrain', bitrate=250000, **options),
+        'body': dict(interface='virtual', channel='test_multi_body', bitrate=250000, transport=False),
+    }
+
+
+@pytest.mark.parametrize('options', [dict(timeseries=None), dict(latest=None), dict(registry=None), dict(offload=True)])
+def test_shared_options_rejected(registry, options):
+    with pytest.raises(ValueError, match="'powertrain'"):
+        MultiConnection(_buses(**options), registry=registry)
+
+
+def test_exit_closes_every_bus(registry, monkeypatch):
+    connection = MultiConnection(_buses(), registry=registry)
+    powertrain, body = connection.connections['powertrain'], connection.connections['body']
+    close = powertrain.__exit__
+
+    def failing_exit(*args):
+        close(*args)
+        raise can.CanOperationError("close failed")
+
+    connection.__enter__()
+    monkeypatch.setattr(powertrain, '__exit__', failing_exit)
+    with pytest.raises(can.CanOperationError):
+        connection.__exit__(None, None, None)
+    assert not powertrain.reader.read_thread.is_alive()
+    assert not body.reader.read_thread.is_alive()
+
+
+def test_read_message_skips_buses_without_transport(registry):
+    payload = bytes(range(20))
+    with MultiConnection(_buses(), registry=registry) as client, \
+            can.Bus(interface='virtual', channel='test_multi_powertrain') as ecu:
+        assert client.read_message(0xFECA) is None
+
+        ecu.send(can.Message(arbitration_id=7 << 26 | TP_CM << 8 | 0xff00,
+                             data=bytes((BAM, 20, 0, 3, 0xff, 0xca, 0xfe, 0)), is_extended_id=True))
+        for seq in range(1, 4):
+            ecu.send(can.Message(arbitration_id=7 << 26 | TP_DT << 8 | 0xff00,
+                                 data=bytes((seq,)) + payload[(seq - 1) * 7:seq * 7].ljust(7, b'\xff'),
+                                 is_extended_id=True))
+        for _ in range(200):
+            message = client.read_message(0xFECA)
+            if message is not None:
+                break
+            time.sleep(0.01)
+        assert message.data == payload
+
+    with MultiConnection(_buses(transport=False), registry=registry) as client:
+        with pytest.raises(RuntimeError):
+            client.read_message(0xFECA)
+
+
+def test_offload_in_settings_rejected(registry):
+    buses = _buses()
+    buses['body']['settings'] = ConnectionSettings(offload=True)
+    with pytest.raises(ValueError, match="'body'"):
+        MultiConnection(buses, registry=registry)
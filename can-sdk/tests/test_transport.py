@@ -0,0 +1,227 @@
+"""
+Transport protocol reassembly (can_sdk.transport). The round trips run a Connection on a python-can virtual bus with
+the sending ECU played on a second bus of the same channel, the other cases drive a TransportReassembler directly
+with frame timestamps so that timeouts do not depend on the clock.
+"""
+import itertools
+import time
+
+import can
+import pytest
+
+from can_sdk.client import Connection
+from can_sdk.transport import (ABORT, ABORT_RESOURCES, ABORT_TIMEOUT, BAM, CTS, END_OF_MSG_ACK, GLOBAL_ADDRESS, RTS,
+                               T1, T2, TP_CM, TP_DT, TransportReassembler)
+
+DM1 = 0xFECA
+ADDRESS = 0x80  # own address of the tested node
+PEER = 0x00  # the sending ECU
+
+_channels = itertools.count()
+
+
+def _cm_id(source: int, destination: int) -> int:
+    return 7 << 26 | TP_CM << 8 | destination << 8 | source
+
+
+def _dt_id(source: int, destination: int) -> int:
+    return 7 << 26 | TP_DT << 8 | destination << 8 | source
+
+
+def _announcement(control: int, payload: bytes, pgn: int = DM1, window: int = 0xff) -> bytes:
+    size = len(payload)
+    return bytes((control, size & 0xff, size >> 8, (size + 6) // 7, window)) + pgn.to_bytes(3, 'little')
+
+
+def _packets(payload: bytes) -> list:
+    """TP.DT data of the payload, the last packet padded with ones"""
+    return [bytes((seq,)) + payload[(seq - 1) * 7:seq * 7].ljust(7, b'\xff')
+            for seq in range(1, (len(payload) + 6) // 7 + 1)]
+
+
+def _payload(size: int) -> bytes:
+    # amber warning and red stop lamp on (DM1 lamp status byte), then a counting pattern
+    return bytes([0x14] + [n & 0xff for n in range(1, size)])
+
+
+def _control(message: can.Message) -> tuple:
+    """(destination, control byte, bytes 1-4, PGN) of a TP.CM frame"""
+    data = message.data
+    return (message.arbitration_id >> 8 & 0xff, data[0], tuple(data[1:5]),
+            data[5] | data[6] << 8 | data[7] << 16)
+
+
+@pytest.fixture
+def channel():
+    return f"test_transport_{next(_channels)}"
+
+
+@pytest.fixture
+def peer(channel):
+    """The sending ECU"""
+    with can.Bus(interface='virtual', channel=channel) as bus:
+        yield bus
+
+
+@pytest.fixture
+def client(registry, channel, peer):
+    """Connection answering connection mode transfers to ADDRESS"""
+    with Connection('virtual', channel, 250000, registry=registry, address=ADDRESS) as client:
+        yield client
+
+
+def _send(bus: can.Bus, arbitration_id: int, data: bytes) -> None:
+    bus.send(can.Message(arbitration_id=arbitration_id, data=data, is_extended_id=True))
+
+
+def _receive_control(bus: can.Bus, timeout: float = 2.0) -> tuple:
+    """Next TP.CM frame sent by the node (periodic frames are skipped)"""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        message = bus.recv(0.1)
+        if message is not None and message.arbitration_id == _cm_id(ADDRESS, PEER):
+            return _control(message)
+    raise AssertionError("No TP.CM frame received")
+
+
+def _wait_message(client, pgn: int, source: int, timeout: float = 2.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        message = client.read_message(pgn, source)
+        if message is not None:
+            return message
+        time.sleep(0.01)
+    raise AssertionError(f"Transfer of PGN {pgn:#x} not reassembled")
+
+
+def test_bam_round_trip(client, peer, registry):
+    payload = _payload(40)
+    _send(peer, _cm_id(PEER, GLOBAL_ADDRESS), _announcement(BAM, payload))
+    for data in _packets(payload):
+        _send(peer, _dt_id(PEER, GLOBAL_ADDRESS), data)
+
+    message = _wait_message(client, DM1, PEER)
+    assert message.data == payload
+    assert (message.pgn, message.source_address, message.destination_address) == (DM1, PEER, GLOBAL_ADDRESS)
+    # the signals of the reassembled PGN are decoded from its first 8 bytes
+    amber, red = registry.frame(DM1).decode(payload[:8])
+    assert (client.read(3), client.read(4)) == (amber, red) == (1, 1)
+
+
+def test_cmdt_round_trip(client, peer):
+    payload = _payload(30)  # 5 packets, requested in windows of 2
+    _send(peer, _cm_id(PEER, ADDRESS), _announcement(RTS, payload, window=2))
+
+    for first in (1, 3, 5):
+        count = min(2, 6 - first)
+        assert _receive_control(peer) == (PEER, CTS, (count, first, 0xff, 0xff), DM1)
+        for data in _packets(payload)[first - 1:first - 1 + count]:
+            _send(peer, _dt_id(PEER, ADDRESS), data)
+    assert _receive_control(peer) == (PEER, END_OF_MSG_ACK, (30, 0, 5, 0xff), DM1)
+
+    message = _wait_message(client, DM1, PEER)
+    assert message.data == payload
+    assert message.destination_address == ADDRESS
+
+
+@pytest.fixture
+def sent():
+    """TP.CM frames sent by the reassembler"""
+    return []
+
+
+@pytest.fixture
+def reassembler(sent):
+    return TransportReassembler([DM1], ADDRESS, sent.append, max_sessions=2)
+
+
+def test_out_of_order_packets(reassembler):
+    payload = _payload(50)
+    packets = _packets(payload)
+    assert reassembler.receive(_cm_id(PEER, GLOBAL_ADDRESS), 0.0, _announcement(BAM, payload)) is None
+    # reversed, with the last packet repeated
+    for data in [packets[-1]] + packets[:0:-1]:
+        assert reassembler.receive(_dt_id(PEER, GLOBAL_ADDRESS), 0.1, data) is None
+
+    message = reassembler.receive(_dt_id(PEER, GLOBAL_ADDRESS), 0.2, packets[0])
+    assert message.data == payload
+    assert reassembler.get(DM1) is message
+    assert reassembler.stats['completed'] == 1
+
+
+def test_missing_packet_requested_again(reassembler, sent):
+    payload = _payload(21)
+    packets = _packets(payload)
+    reassembler.receive(_cm_id(PEER, ADDRESS), 0.0, _announcement(RTS, payload))
+    assert _control(sent.pop()) == (PEER, CTS, (3, 1, 0xff, 0xff), DM1)
+
+    reassembler.receive(_dt_id(PEER, ADDRESS), 0.1, packets[0])
+    reassembler.receive(_dt_id(PEER, ADDRESS), 0.1, packets[2])
+    # the window ended without packet 2, it is requested again
+    assert _control(sent.pop()) == (PEER, CTS, (2, 2, 0xff, 0xff), DM1)
+
+    message = reassembler.receive(_dt_id(PEER, ADDRESS), 0.2, packets[1])
+    assert message.data == payload
+    assert _control(sent.pop()) == (PEER, END_OF_MSG_ACK, (21, 0, 3, 0xff), DM1)
+
+
+def test_missing_packet_times_out(reassembler):
+    payload = _payload(21)
+    packets = _packets(payload)
+    reassembler.receive(_cm_id(PEER, GLOBAL_ADDRESS), 0.0, _announcement(BAM, payload))
+    reassembler.receive(_dt_id(PEER, GLOBAL_ADDRESS), 0.1, packets[0])
+    reassembler.receive(_dt_id(PEER, GLOBAL_ADDRESS), 0.1, packets[2])
+
+    # packet 2 comes too late, the transfer was given up
+    assert reassembler.receive(_dt_id(PEER, GLOBAL_ADDRESS), 0.1 + T1 + 0.01, packets[1]) is None
+    assert reassembler.stats['timed_out'] == 1
+    assert reassembler.get(DM1) is None
+
+    # its session is free again
+    reassembler.receive(_cm_id(PEER, GLOBAL_ADDRESS), 2.0, _announcement(BAM, payload))
+    for data in packets:
+        message = reassembler.receive(_dt_id(PEER, GLOBAL_ADDRESS), 2.1, data)
+    assert message.data == payload
+
+
+def test_connection_mode_timeout_aborts(reassembler, sent):
+    payload = _payload(21)
+    reassembler.receive(_cm_id(PEER, ADDRESS), 0.0, _announcement(RTS, payload))
+    sent.clear()
+
+    assert reassembler.receive(_dt_id(PEER, ADDRESS), T2 + 0.01, _packets(payload)[0]) is None
+    assert [_control(m) for m in sent] == [(PEER, ABORT, (ABORT_TIMEOUT, 0xff, 0xff, 0xff), DM1)]
+    assert reassembler.stats['timed_out'] == 1
+
+
+def test_abort_by_sender(reassembler, sent):
+    payload = _payload(21)
+    packets = _packets(payload)
+    reassembler.receive(_cm_id(PEER, ADDRESS), 0.0, _announcement(RTS, payload))
+    reassembler.receive(_dt_id(PEER, ADDRESS), 0.1, packets[0])
+    reassembler.receive(_cm_id(PEER, ADDRESS), 0.2, bytes((ABORT, 1, 0xff, 0xff, 0xff)) + DM1.to_bytes(3, 'little'))
+    assert reassembler.stats['aborted'] == 1
+
+    # the data packets of the aborted transfer are ignored
+    for data in packets[1:]:
+        assert reassembler.receive(_dt_id(PEER, ADDRESS), 0.3, data) is None
+    assert reassembler.get(DM1, PEER) is None
+
+
+def test_no_free_session(reassembler, sent):
+    payload = _payload(21)
+    for source in (1, 2):
+        reassembler.receive(_cm_id(source, GLOBAL_ADDRESS), 0.0, _announcement(BAM, payload))
+    sent.clear()
+
+    reassembler.receive(_cm_id(PEER, ADDRESS), 0.0, _announcement(RTS, payload))
+    assert [_control(m) for m in sent] == [(PEER, ABORT, (ABORT_RESOURCES, 0xff, 0xff, 0xff), DM1)]
+    assert reassembler.stats['dropped'] == 1
+
+
+def test_ignored_pgn(reassembler):
+    payload = _payload(21)
+    reassembler.receive(_cm_id(PEER, GLOBAL_ADDRESS), 0.0, _announcement(BAM, payload, pgn=0xFEE5))
+    for data in _packets(payload):
+        assert reassembler.receive(_dt_id(PEER, GLOBAL_ADDRESS), 0.1, data) is None
+    assert reassembler.messages == {}
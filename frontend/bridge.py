@@ -0,0 +1,59 @@
+import threading
+import time
+
+from PySide6.QtCore import QObject, Qt, QTimer, Signal
+from PySide6.QtGui import QGuiApplication
+
+
+class ValueBridge(QObject):
+    """
+    Brings SDK value updates into the Qt event loop.
+    The subscriber callback runs in the SDK reader thread and only keeps the newest value per signal,
+    the GUI thread takes all pending values at most once per display frame and emits them with valuesChanged,
+    so any number of fast changing signals cost one slot call per frame and nothing while the bus is idle.
+    """
+    valuesChanged = Signal(object)  # {signal_id: SignalValue}
+    _wake = Signal()
+
+    def __init__(self, client, signal_ids, fps=None, on_change_only=True, parent=None):
+        super().__init__(parent)
+        if fps is None:
+            screen = QGuiApplication.primaryScreen()
+            fps = screen.refreshRate() if screen is not None and screen.refreshRate() > 0 else 60
+        self.interval = 1 / fps
+
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._last_flush = 0.0
+
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.setTimerType(Qt.PreciseTimer)
+        self._timer.timeout.connect(self._flush)
+        # emitted from the reader thread, delivered in the GUI thread (queued connection)
+        self._wake.connect(self._schedule, Qt.QueuedConnection)
+
+        self.subscription = client.subscribe(signal_ids, self._on_value, on_change_only=on_change_only)
+
+    def _on_value(self, signal_id, value):
+        with self._lock:
+            wake = not self._pending
+            self._pending[signal_id] = value
+        if wake:
+            self._wake.emit()
+
+    def _schedule(self):
+        if not self._timer.isActive():
+            delay = self.interval - (time.monotonic() - self._last_flush)
+            self._timer.start(max(0, round(delay * 1000)))
+
+    def _flush(self):
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        self._last_flush = time.monotonic()
+        if pending:
+            self.valuesChanged.emit(pending)
+
+    def stop(self):
+        self.subscription.cancel()
+        self._timer.stop()
@@ -1,8 +1,13 @@
 import sys
-from PySide6.QtWidgets import QApplication, QMainWindow, QPushButton, QLabel, QVBoxLayout, QWidget, QBoxLayout, QFrame, QSpinBox, QLineEdit, QComboBox, QHBoxLayout
+from PySide6.QtWidgets import QApplication, QMainWindow, QPushButton, QLabel, QVBoxLayout, QWidget, QBoxLayout, QFrame, QSpinBox, QLineEdit, QComboBox
 from can_sdk.client import Connection
 from can_sdk.config import read as read_config, FrameValueDirection
-import json
+from bridge import ValueBridge
+from trend import TrendHistory, TrendWidget
+from settings import UserSettings
+from signal_table import SignalBrowser, SignalTableModel, VALUE
+
+settings = UserSettings("config_user.json")
 
 def divider():
     divider = QFrame()
@@ -10,9 +15,7 @@ def divider():
     return divider
 
 def showed_ids():
-    with open("config_user.json", "r") as file_user:
-        data_user = json.load(file_user)
-        return data_user["showed_ids"]
+    return settings.showed_ids()
 
 class ErrorWindow(QMainWindow):
     def __init__(self, message):
@@ -66,12 +69,10 @@ class ConfigWindow(QMainWindow):
         input_layout.addWidget(input_2)
         input_layout.addWidget(input_3)
 
-        with open("config_user.json", "r") as file_user:
-            data_user = json.load(file_user)
-            bus_details = data_user["busDetails"]
-            input_1.setText(bus_details["bustype"])
-            input_2.setText(bus_details["channel"])
-            input_3.setValue(bus_details["bitrate"])
+        bus_details = settings.bus_details()
+        input_1.setText(bus_details["bustype"])
+        input_2.setText(bus_details["channel"])
+        input_3.setValue(bus_details["bitrate"])
 
         def setInputValues(index):
             if (index == -1):
@@ -115,28 +116,35 @@ class ConfigWindow(QMainWindow):
         self.close()
 
     def save_changes(self, bustype, channel, bitrate):
-        # Update values in JSON file
-        with open("config_user.json", "r") as file_user:
-            data_user = json.load(file_user)
-            bus_details = data_user["busDetails"]
-            bus_details["bustype"] = bustype
-            bus_details["channel"] = channel
-            bus_details["bitrate"] = bitrate
-
-        with open("config_user.json", "w") as file_user:
-            json.dump(data_user, file_user)
+        # Saved to config_user.json in the background
+        settings.set_bus_details(bustype, channel, bitrate)
 
 class DetailWindow(QMainWindow):
-    def __init__(self, name, value):
+    def __init__(self, name, value, client=None, signal_id=None, ring=None):
         super().__init__()
         self.setWindowTitle(f"Detail for {name}")
         layout = QVBoxLayout()
         info_label = QLabel(f"{name}: {value}")
         layout.addWidget(info_label)
+
+        # Trend of the received values (scroll to zoom), from the recorded history if there is one
+        self.trend = None
+        if client is not None and signal_id is not None:
+            self.trend = TrendWidget()
+            self.trend.add_series(signal_id, name, ring=ring)
+            self.trend.attach(client)
+            layout.addWidget(self.trend)
+            self.resize(600, 300)
+
         central_widget = QWidget()
         central_widget.setLayout(layout)
         self.setCentralWidget(central_widget)
 
+    def closeEvent(self, event):
+        if self.trend is not None:
+            self.trend.stop()
+        super().closeEvent(event)
+
 class MainWindow(QMainWindow):
     def __init__(self, bustype, channel, bitrate):
         self.connection = Connection(bustype, channel, bitrate)
@@ -171,45 +179,57 @@ class MainWindow(QMainWindow):
         layout.addLayout(column_layout)
         layout.addWidget(divider())
 
-        with open('config_system.json', 'r') as file:
-            data_system = json.load(file)
-
-        # Convert system data to a dictionary for easier ID-based access
-        all_system_objects = {item['id']: item for item in data_system}
+        # Frame values by id, looked up once instead of searching the config for every shown id
+        frames = {frame["id"]: frame for frame in read_config()}
 
-        # Load JSON data from user configuration file
-        with open("config_user.json", "r") as file_user:
-            data_user = json.load(file_user)
-
-        # Iterate over user-specified IDs and values
-        for item in data_user["showed_ids"]:
-            item_id = item['id']  # Convert ID to integer for matching
-            value = item['value']
+        # Table of the displayed values, only the visible rows are drawn (double click or Trend for the trend)
+        shown = []
+        for item in showed_ids():
+            item_id = item['id']
+            frame = frames.get(item_id)
+            if frame is None:
+                print(f"Item with ID {item_id} not found in system configuration.")
+                continue
+            self.client.receiving(item_id, item['value'], "rx" if frame["direction"] == FrameValueDirection.RX else "tx")
+            if frame["direction"] == FrameValueDirection.TX:
+                shown.append(frame)
+
+        self.signal_model = SignalTableModel(shown, self)
+        self.signal_model.update_values({frame["id"]: self.client.read(frame["id"]) for frame in shown})
+        self.signal_browser = SignalBrowser(self.signal_model)
+        self.signal_browser.activated.connect(self.openTrend)
+        trend_button = QPushButton("Trend")
+        trend_button.clicked.connect(lambda: self.openTrend(self.signal_browser.selected_frame()))
+        column_layout.addWidget(trend_button)
+        layout.addWidget(self.signal_browser)
 
-            # Check if the item ID exists in system configuration data
-            if item_id in all_system_objects:
-                system_item = all_system_objects[item_id]
+        central_widget = QWidget()
+        central_widget.setLayout(layout)
 
-                resultvalue = self.client.receiving(item_id, value, system_item["kind"])
+        self.setCentralWidget(central_widget)
 
+        # History of the displayed values for their trends, recorded for as long as the connection is open
+        self.trend_history = TrendHistory(self.client, self.signal_model.ids())
 
-                # Prepare the label text
-                label_text = f"{system_item['name']}: {resultvalue} {system_item.get('dim', 'No dimension')}"
+        # The table follows the received values, updated at most once per display frame
+        self.bridge = ValueBridge(self.client, self.signal_model.ids(), parent=self)
+        self.bridge.valuesChanged.connect(self.update_values)
 
-                # Create and add the label to the layout
-                if system_item["kind"] == "tx":
-                    label = QLabel(label_text)
-                    layout.addWidget(label)
-            else:
-                print(f"Item with ID {item_id} not found in system configuration.")
+    def update_values(self, values):
+        self.signal_model.update_values({item_id: value.value for item_id, value in values.items()})
 
-        central_widget = QWidget()
-        central_widget.setLayout(layout)
+    def openTrend(self, frame):
+        if frame is not None:
+            self.openDetailWindow(frame["name"], self.client.read(frame["id"]), frame["id"])
 
-        self.setCentralWidget(central_widget)
+    def closeEvent(self, event):
+        self.bridge.stop()
+        self.trend_history.stop()
+        self.connection.__exit__(None, None, None)
+        super().closeEvent(event)
 
-    def openDetailWindow(self, name, value):
-        self.detail_window = DetailWindow(name, value)
+    def openDetailWindow(self, name, value, signal_id=None):
+        self.detail_window = DetailWindow(name, value, self.client, signal_id, self.trend_history.ring(signal_id))
         self.detail_window.show()
 
     def openInputWindow(self, client):
@@ -231,74 +251,52 @@ class InputWindow(QMainWindow):
         column_layout.addWidget(info_label)
         column_layout.addWidget(closer)
 
-        # create new column layout and add two inputs for a string and one input for a number
-        input_layout = QBoxLayout(QBoxLayout.LeftToRight)
-
-        self.add_combobox = QComboBox()
-
-        self.filtered_frames = read_config()
+        frames = {frame["id"]: frame for frame in read_config() if frame["direction"] == FrameValueDirection.RX}
+        shown = [frames[item["id"]] for item in showed_ids() if item["id"] in frames]
+        values = {item["id"]: item["value"] for item in showed_ids()}
 
-        for showed_frame in showed_ids():
-            self.filtered_frames = filter(lambda frame: frame["id"] != showed_frame["id"] and frame["direction"] == FrameValueDirection.RX, self.filtered_frames)
-
-        self.filtered_frames = list(self.filtered_frames)
-
-        for frame in self.filtered_frames:
-            self.add_combobox.addItem(frame["name"], frame["id"])
-
-        input_layout.addWidget(self.add_combobox)
+        # Signals that can still be added (double click or Add) and the already shown ones with their values
+        self.available_model = SignalTableModel(frames.values(), self)
+        self.available_model.remove_ids(values)
+        self.available_browser = SignalBrowser(self.available_model)
+        self.available_browser.view.setColumnHidden(VALUE, True)
+        self.available_browser.activated.connect(self.add_frame)
 
         add_button = QPushButton("Add")
-        add_button.clicked.connect(lambda: self.add_value(self.filtered_frames[self.add_combobox.currentIndex()]["id"], 0))
-        input_layout.addWidget(add_button)
-
-        self.list_layout = QVBoxLayout()
-        for frame in showed_ids():
-            frame_id = frame["id"]
-            frame_value = frame["value"]
-            frame_name = next(filter(lambda frame: frame["id"] == frame_id, read_config()))["name"]
-            frame_layout = QBoxLayout(QBoxLayout.LeftToRight)
-            frame_label = QLabel(f"{frame_name}: {frame_value}")
-            frame_direction = next(filter(lambda frame: frame["id"] == frame_id, read_config()))["direction"]
-            frame_input = QLineEdit()
-            frame_input.setPlaceholderText("Enter value")
-            frame_layout.addWidget(frame_label)
-            if frame_direction == FrameValueDirection.RX:
-              self.list_layout.addLayout(frame_layout)
+        add_button.clicked.connect(lambda: self.add_frame(self.available_browser.selected_frame()))
+
+        self.shown_model = SignalTableModel(shown, self)
+        self.shown_model.update_values(values)
+        self.shown_browser = SignalBrowser(self.shown_model)
 
         layout.addLayout(column_layout)
         layout.addWidget(divider())
-        layout.addLayout(input_layout)
+        layout.addWidget(self.available_browser)
+        layout.addWidget(add_button)
         layout.addWidget(divider())
-        layout.addLayout(self.list_layout)
+        layout.addWidget(self.shown_browser)
 
         central_widget = QWidget()
         central_widget.setLayout(layout)
         self.setCentralWidget(central_widget)
 
-    def add_value(self, id, value):
-        with open("config_user.json", "r") as file_user:
-            data_user = json.load(file_user)
-            showed_ids = data_user["showed_ids"]
-            showed_ids.append({"id": id, "value": value})
-
-        with open("config_user.json", "w") as file_user:
-            json.dump(data_user, file_user)
-
-        for showed_frame in showed_ids:
-            self.filtered_frames = filter(lambda frame: frame["id"] != showed_frame["id"] and frame["direction"] == FrameValueDirection.RX, self.filtered_frames)
+    def add_frame(self, frame):
+        if frame is not None:
+            self.add_value(frame["id"], 0)
 
-        self.filtered_frames = list(self.filtered_frames)
-
-        self.add_combobox.clear()
-
-        for frame in self.filtered_frames:
-            self.add_combobox.addItem(frame["name"], frame["id"])
+    def add_value(self, id, value):
+        settings.add_showed_id(id, value)
 
-        self.list_layout = QVBoxLayout()
+        frame = self.available_model.frame_of(id)
+        if frame is not None:
+            self.available_model.remove_ids([id])
+            self.shown_model.add_frames([frame])
+        self.shown_model.update_values({id: value})
 
 if __name__ == "__main__":
     app = QApplication(sys.argv)
     main_window = ConfigWindow()
     main_window.show()
-    sys.exit(app.exec())
+    exit_code = app.exec()
+    settings.close()
+    sys.exit(exit_code)
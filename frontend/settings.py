@@ -0,0 +1,112 @@
+import atexit
+import json
+import os
+import threading
+import time
+
+DEFAULTS = {
+    "showed_ids": [],
+    "busDetails": {
+        "bustype": "",
+        "channel": "",
+        "bitrate": 0
+    }
+}
+
+
+class UserSettings:
+    """
+    config_user.json loaded once and kept in memory.
+    Changes only mark the settings dirty, a background thread writes them once no change happened for delay seconds
+    (or max_delay seconds after the first unsaved change) to a temporary file that atomically replaces the original,
+    so the GUI thread never waits for the disk and a crash never leaves a half written file.
+    """
+    def __init__(self, path="config_user.json", delay=0.5, max_delay=5.0):
+        self.path = path
+        self.delay = delay
+        self.max_delay = max_delay
+        self.data = self._load()
+
+        self._lock = threading.Condition()
+        self._changed = None  # time of the last unsaved change
+        self._first_change = None
+        self._closed = False
+        self._writer = threading.Thread(target=self._write_loop, name="settings-writer", daemon=True)
+        self._writer.start()
+        atexit.register(self.close)
+
+    def _load(self):
+        try:
+            with open(self.path, "r") as file:
+                data = json.load(file)
+        except (FileNotFoundError, json.JSONDecodeError):
+            data = {}
+        for key, value in DEFAULTS.items():
+            data.setdefault(key, json.loads(json.dumps(value)))
+        return data
+
+    def showed_ids(self):
+        with self._lock:
+            return [dict(item) for item in self.data["showed_ids"]]
+
+    def bus_details(self):
+        with self._lock:
+            return dict(self.data["busDetails"])
+
+    def set_bus_details(self, bustype, channel, bitrate):
+        with self._lock:
+            self.data["busDetails"].update(bustype=bustype, channel=channel, bitrate=bitrate)
+            self._mark_changed()
+
+    def add_showed_id(self, id, value):
+        with self._lock:
+            self.data["showed_ids"].append({"id": id, "value": value})
+            self._mark_changed()
+
+    def _mark_changed(self):
+        now = time.monotonic()
+        if self._changed is None:
+            self._first_change = now
+        self._changed = now
+        self._lock.notify()
+
+    def _write_loop(self):
+        with self._lock:
+            while True:
+                while self._changed is None and not self._closed:
+                    self._lock.wait()
+                if self._changed is None:
+                    return
+                # debounce: wait until the settings stopped changing (or waited long enough)
+                while not self._closed:
+                    now = time.monotonic()
+                    due = min(self._changed + self.delay, self._first_change + self.max_delay)
+                    if now >= due:
+                        break
+                    self._lock.wait(due - now)
+                snapshot = json.dumps(self.data, indent=2)
+                self._changed = None
+                self._lock.release()
+                try:
+                    self._write(snapshot)
+                except OSError as e:
+                    print(f"Could not save {self.path}: {e}")
+                finally:
+                    self._lock.acquire()
+                if self._closed and self._changed is None:
+                    return
+
+    def _write(self, content):
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w") as file:
+            file.write(content)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(tmp_path, self.path)
+
+    def close(self):
+        """Writes pending changes and stops the writer thread"""
+        with self._lock:
+            self._closed = True
+            self._lock.notify()
+        self._writer.join()
@@ -0,0 +1,215 @@
+from PySide6.QtCore import QAbstractTableModel, QModelIndex, QSortFilterProxyModel, Qt, QTimer, Signal
+from PySide6.QtWidgets import QAbstractItemView, QHeaderView, QLineEdit, QTableView, QVBoxLayout, QWidget
+
+ID, NAME, PGN, VALUE, DIM = range(5)
+HEADERS = ["Id", "Name", "PGN", "Value", "Dim"]
+
+
+class SignalTableModel(QAbstractTableModel):
+    """
+    Table of frame values (entries of can_sdk.config.read) with their current value.
+    Only the rows the view shows are ever asked for, so thousands of signals cost no widgets;
+    update_values emits dataChanged for the value cells whose value actually changed.
+    """
+    def __init__(self, frames=(), parent=None):
+        super().__init__(parent)
+        self._frames = []
+        self._values = []
+        self._keys = []  # lowercase "id name pgn" of every row for the search
+        self._rows = {}  # {signal_id: row}
+        self.add_frames(frames)
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._frames)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(HEADERS)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return HEADERS[section]
+        return None
+
+    def data(self, index, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole:
+            frame = self._frames[index.row()]
+            column = index.column()
+            if column == ID:
+                return str(frame["id"])
+            if column == NAME:
+                return frame["name"]
+            if column == PGN:
+                return f"0x{frame['frame']['pgn']:04X}"
+            if column == VALUE:
+                value = self._values[index.row()]
+                return "" if value is None else str(value)
+            return frame.get("dim", "")
+        if role == Qt.TextAlignmentRole and index.column() in (ID, PGN, VALUE):
+            return int(Qt.AlignRight | Qt.AlignVCenter)
+        if role == Qt.UserRole:
+            return self._frames[index.row()]
+        return None
+
+    def sort(self, column, order=Qt.AscendingOrder):
+        """
+        Sorts the rows in place with Python keys (a sorting proxy would ask data() for every comparison)
+        """
+        keys = {
+            ID: lambda row: self._frames[row]["id"],
+            NAME: lambda row: self._frames[row]["name"].lower(),
+            PGN: lambda row: self._frames[row]["frame"]["pgn"],
+            VALUE: lambda row: float("-inf") if self._values[row] is None else self._values[row],
+            DIM: lambda row: self._frames[row].get("dim", ""),
+        }
+        self.layoutAboutToBeChanged.emit()
+        order = sorted(range(len(self._frames)), key=keys[column], reverse=order == Qt.DescendingOrder)
+        position = {old: new for new, old in enumerate(order)}
+        self._frames = [self._frames[row] for row in order]
+        self._values = [self._values[row] for row in order]
+        self._keys = [self._keys[row] for row in order]
+        self._rows = {frame["id"]: row for row, frame in enumerate(self._frames)}
+        old = self.persistentIndexList()
+        self.changePersistentIndexList(old, [self.index(position[index.row()], index.column()) for index in old])
+        self.layoutChanged.emit()
+
+    def frame(self, row):
+        return self._frames[row]
+
+    def frame_of(self, signal_id):
+        row = self._rows.get(signal_id)
+        return self._frames[row] if row is not None else None
+
+    def search_key(self, row):
+        return self._keys[row]
+
+    def ids(self):
+        return list(self._rows)
+
+    def add_frames(self, frames):
+        frames = [frame for frame in frames if frame["id"] not in self._rows]
+        if not frames:
+            return
+        first = len(self._frames)
+        self.beginInsertRows(QModelIndex(), first, first + len(frames) - 1)
+        for row, frame in enumerate(frames, first):
+            self._frames.append(frame)
+            self._values.append(None)
+            pgn = frame["frame"]["pgn"]
+            self._keys.append(f"{frame['id']} {frame['name']} 0x{pgn:04x} {pgn}".lower())
+            self._rows[frame["id"]] = row
+        self.endInsertRows()
+
+    def remove_ids(self, ids):
+        rows = sorted((self._rows[i] for i in ids if i in self._rows), reverse=True)
+        # remove runs of consecutive rows from the bottom up, so the rows of the next run stay valid
+        while rows:
+            last = first = rows.pop(0)
+            while rows and rows[0] == first - 1:
+                first = rows.pop(0)
+            self.beginRemoveRows(QModelIndex(), first, last)
+            del self._frames[first:last + 1], self._values[first:last + 1], self._keys[first:last + 1]
+            self.endRemoveRows()
+        self._rows = {frame["id"]: row for row, frame in enumerate(self._frames)}
+
+    def update_values(self, values):
+        """values: {signal_id: value}, signals not in the table are ignored"""
+        changed = []
+        for signal_id, value in values.items():
+            row = self._rows.get(signal_id)
+            if row is not None and self._values[row] != value:
+                self._values[row] = value
+                changed.append(row)
+        if not changed:
+            return
+        # one dataChanged per run of consecutive rows
+        changed.sort()
+        first = last = changed[0]
+        for row in changed[1:] + [None]:
+            if row == last + 1:
+                last = row
+                continue
+            self.dataChanged.emit(self.index(first, VALUE), self.index(last, VALUE), [Qt.DisplayRole])
+            if row is not None:
+                first = last = row
+
+
+class SignalFilterProxy(QSortFilterProxyModel):
+    """
+    Rows of a SignalTableModel matching a search text: every word of the text has to be part of the
+    id, name or PGN (hex or decimal) of the signal
+    """
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._words = []
+        # the filter only depends on the static columns, value updates need not be filtered (or sorted) again
+        self.setDynamicSortFilter(False)
+
+    def set_search(self, text):
+        words = text.lower().split()
+        if words != self._words:
+            self._words = words
+            self.invalidateFilter()
+
+    def sort(self, column, order=Qt.AscendingOrder):
+        # sorted by the source model, this proxy keeps its order
+        self.sourceModel().sort(column, order)
+
+    def filterAcceptsRow(self, source_row, source_parent):
+        if not self._words:
+            return True
+        key = self.sourceModel().search_key(source_row)
+        return all(word in key for word in self._words)
+
+
+class SignalBrowser(QWidget):
+    """
+    Search field above a table of the signals of a SignalTableModel.
+    The search is applied while typing (after a short pause, so fast typing filters once)
+    """
+    activated = Signal(object)  # FrameValue of a double clicked row
+
+    def __init__(self, model, search_delay=100, parent=None):
+        super().__init__(parent)
+        self.model = model
+
+        self.search = QLineEdit()
+        self.search.setPlaceholderText("Search by name, PGN or id")
+        self.search.setClearButtonEnabled(True)
+
+        self.proxy = SignalFilterProxy(self)
+        self.proxy.setSourceModel(model)
+
+        self.view = QTableView()
+        self.view.setModel(self.proxy)
+        self.view.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.view.setSelectionMode(QAbstractItemView.SingleSelection)
+        self.view.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.view.setSortingEnabled(True)
+        self.view.sortByColumn(ID, Qt.AscendingOrder)
+        self.view.setWordWrap(False)
+        # fixed row heights, so the view never measures rows it does not show
+        vertical = self.view.verticalHeader()
+        vertical.hide()
+        vertical.setSectionResizeMode(QHeaderView.Fixed)
+        vertical.setDefaultSectionSize(self.view.fontMetrics().height() + 6)
+        horizontal = self.view.horizontalHeader()
+        horizontal.setSectionResizeMode(QHeaderView.Interactive)
+        horizontal.setSectionResizeMode(NAME, QHeaderView.Stretch)
+        self.view.doubleClicked.connect(lambda index: self.activated.emit(index.data(Qt.UserRole)))
+
+        self._search_timer = QTimer(self)
+        self._search_timer.setSingleShot(True)
+        self._search_timer.setInterval(search_delay)
+        self._search_timer.timeout.connect(lambda: self.proxy.set_search(self.search.text()))
+        self.search.textChanged.connect(self._search_timer.start)
+
+        layout = QVBoxLayout()
+        layout.setContentsMargins(0, 0, 0, 0)
+        layout.addWidget(self.search)
+        layout.addWidget(self.view)
+        self.setLayout(layout)
+
+    def selected_frame(self):
+        """FrameValue of the selected row, None if no row is selected"""
+        rows = self.view.selectionModel().selectedRows()
+        return rows[0].data(Qt.UserRole) if rows else None
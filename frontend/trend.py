@@ -0,0 +1,271 @@
+import math
+import threading
+import time
+
+from array import array
+
+from PySide6.QtCore import QRect, Qt, QTimer
+from PySide6.QtGui import QColor, QPainter, QPen, QPixmap
+from PySide6.QtWidgets import QWidget
+
+COLORS = ["#1f77b4", "#d62728", "#2ca02c", "#ff7f0e", "#9467bd", "#8c564b"]
+
+
+class MinMaxLevel:
+    """
+    Ring of the min/max of consecutive time buckets of one width, a bucket is found by its number (start / width)
+    """
+    def __init__(self, width, capacity):
+        self.width = width
+        self.capacity = capacity
+        self.numbers = array('q', [-1]) * capacity
+        self.mins = array('d', [0.0]) * capacity
+        self.maxs = array('d', [0.0]) * capacity
+        self.last = None  # number of the newest bucket
+
+    def add(self, timestamp, value):
+        number = int(timestamp // self.width)
+        slot = number % self.capacity
+        if self.numbers[slot] != number:
+            self.numbers[slot] = number
+            self.mins[slot] = self.maxs[slot] = value
+            self.last = number if self.last is None else max(self.last, number)
+        elif value < self.mins[slot]:
+            self.mins[slot] = value
+        elif value > self.maxs[slot]:
+            self.maxs[slot] = value
+
+    def oldest(self):
+        """Start time of the oldest bucket the ring can still hold"""
+        return None if self.last is None else (self.last - self.capacity + 1) * self.width
+
+    def buckets(self, start, end):
+        """(start, min, max) of the stored buckets overlapping [start, end)"""
+        if self.last is None:
+            return []
+        first = max(int(start // self.width), self.last - self.capacity + 1)
+        stop = min(int(math.ceil(end / self.width)), self.last + 1)
+        result = []
+        for number in range(first, stop):
+            slot = number % self.capacity
+            if self.numbers[slot] == number:
+                result.append((number * self.width, self.mins[slot], self.maxs[slot]))
+        return result
+
+
+class DecimatedRing:
+    """
+    Min/max history of one signal at several resolutions (base, base * factor, base * factor^2, ...),
+    each kept in a fixed size ring, so memory and the cost of drawing any time span are bounded
+    regardless of how long the signal has been recorded. Samples are added from the SDK reader thread.
+    """
+    def __init__(self, base=0.01, factor=4, levels=8, capacity=2048):
+        self.levels = [MinMaxLevel(base * factor ** k, capacity) for k in range(levels)]
+        self.lock = threading.Lock()
+        self.low = math.inf
+        self.high = -math.inf
+        self.offset = None  # sample timestamps - time.time(), taken from the first sample
+
+    def add(self, timestamp, value):
+        with self.lock:
+            if self.offset is None:
+                self.offset = timestamp - time.time()
+            for level in self.levels:
+                level.add(timestamp, value)
+            if value < self.low:
+                self.low = value
+            if value > self.high:
+                self.high = value
+
+    def buckets(self, start, end, resolution):
+        """
+        Buckets overlapping [start, end) from the coarsest level that is still at least as fine as resolution
+        and reaches back to start (or the coarsest one if no level reaches back that far)
+        """
+        with self.lock:
+            chosen = self.levels[-1]
+            for level in self.levels:
+                oldest = level.oldest()
+                if oldest is not None and oldest <= start:
+                    chosen = level
+                    break
+            for level in self.levels:
+                if chosen.width < level.width <= resolution and level.oldest() is not None and level.oldest() <= start:
+                    chosen = level
+            return chosen.buckets(start, end)
+
+
+class TrendHistory:
+    """
+    Decimated rings of signals recorded for as long as the connection is open, so a trend opened later shows
+    the history since the connection was established. Values are added from the SDK reader thread.
+    """
+    def __init__(self, client, signal_ids):
+        self.rings = {signal_id: DecimatedRing() for signal_id in signal_ids}
+        self._subscription = client.subscribe(list(self.rings), self._on_value) if self.rings else None
+
+    def _on_value(self, signal_id, value):
+        self.rings[signal_id].add(value.timestamp, value.value)
+
+    def ring(self, signal_id):
+        return self.rings.get(signal_id)
+
+    def stop(self):
+        if self._subscription is not None:
+            self._subscription.cancel()
+            self._subscription = None
+
+
+class TrendWidget(QWidget):
+    """
+    Scrolling min/max trend of one or more signals.
+    The plot is kept in a pixmap that is scrolled as time passes, only the newly exposed columns are drawn;
+    zooming (mouse wheel, one second to a day) and range changes redraw the plot once from the decimated rings.
+    """
+    def __init__(self, span=60.0, fps=30, parent=None):
+        super().__init__(parent)
+        self.span = span
+        self.series = []  # [(signal_id, name, DecimatedRing, QColor)]
+        self.low = self.high = None
+        self.setMinimumSize(300, 150)
+
+        self._subscription = None
+        self._own_rings = {}  # {signal_id: DecimatedRing} of the series filled by attach
+        self._pixmap = None
+        self._right = None  # time at the right edge of the pixmap
+
+        self._timer = QTimer(self)
+        self._timer.timeout.connect(self._tick)
+        self._timer.start(round(1000 / fps))
+
+    def add_series(self, signal_id, name, color=None, ring=None):
+        """ring: recorded history of the signal (e.g. of a TrendHistory), a new ring filled by attach if None"""
+        color = QColor(color if color is not None else COLORS[len(self.series) % len(COLORS)])
+        if ring is None:
+            ring = self._own_rings[signal_id] = DecimatedRing()
+        self.series.append((signal_id, name, ring, color))
+
+    def attach(self, client):
+        """Subscribes to the signals of the series without a given ring, every received value is added to its ring"""
+        rings = self._own_rings
+        if not rings:
+            return
+
+        def on_value(signal_id, value):
+            rings[signal_id].add(value.timestamp, value.value)
+
+        self._subscription = client.subscribe(list(rings), on_value)
+
+    def stop(self):
+        self._timer.stop()
+        if self._subscription is not None:
+            self._subscription.cancel()
+            self._subscription = None
+
+    def _now(self):
+        offset = next((ring.offset for _, _, ring, _ in self.series if ring.offset is not None), 0.0)
+        return time.time() + offset
+
+    def wheelEvent(self, event):
+        factor = 1.25 if event.angleDelta().y() < 0 else 0.8
+        self.span = min(max(self.span * factor, 1.0), 24 * 3600.0)
+        self._pixmap = None
+        self.update()
+
+    def resizeEvent(self, event):
+        self._pixmap = None
+        super().resizeEvent(event)
+
+    def _tick(self):
+        if any(ring.low <= ring.high for _, _, ring, _ in self.series):
+            self._update_range()
+        now = self._now()
+        if self._pixmap is None:
+            self._redraw(now)
+        else:
+            spp = self.span / self._pixmap.width()
+            shift = int((now - self._right) / spp)
+            if shift >= self._pixmap.width():
+                self._redraw(now)
+            else:
+                if shift > 0:
+                    self._pixmap.scroll(-shift, 0, self._pixmap.rect())
+                    self._right += shift * spp
+                # the newest column is still filling up, draw it again with the exposed ones
+                self._draw_columns(self._pixmap.width() - shift - 1, self._pixmap.width())
+        self.update()
+
+    def _update_range(self):
+        low = min(ring.low for _, _, ring, _ in self.series)
+        high = max(ring.high for _, _, ring, _ in self.series)
+        if self.low is not None and self.low <= low and high <= self.high:
+            return
+        margin = (high - low) * 0.1 or abs(high) * 0.1 or 1.0
+        self.low, self.high = low - margin, high + margin
+        self._pixmap = None
+
+    def _redraw(self, now):
+        self._pixmap = QPixmap(max(1, self.width()), max(1, self.height()))
+        self._right = now
+        self._draw_columns(0, self._pixmap.width())
+
+    def _draw_columns(self, x_from, x_to):
+        pixmap = self._pixmap
+        width, height = pixmap.width(), pixmap.height()
+        spp = self.span / width
+        left = self._right - self.span
+
+        painter = QPainter(pixmap)
+        painter.fillRect(QRect(x_from, 0, x_to - x_from, height), Qt.white)
+        if self.low is None:
+            painter.end()
+            return
+        scale = (height - 1) / (self.high - self.low)
+
+        # start one column earlier to join the new columns to the already drawn ones
+        start = left + max(x_from - 1, 0) * spp
+        end = left + x_to * spp
+        for _, _, ring, color in self.series:
+            painter.setPen(QPen(color, 1))
+            previous = None  # (low, high) of the previous column
+            column = lo = hi = None
+            for bucket_start, bucket_min, bucket_max in ring.buckets(start, end, spp) + [(None, 0, 0)]:
+                x = int((bucket_start - left) / spp) if bucket_start is not None else None
+                if x != column and column is not None:
+                    if previous is not None and previous[0] == column - 1:
+                        # overlap the previous column so consecutive columns form a continuous line
+                        y_lo, y_hi = min(lo, previous[2]), max(hi, previous[1])
+                    else:
+                        y_lo, y_hi = lo, hi
+                    top = round(height - 1 - (y_hi - self.low) * scale)
+                    bottom = round(height - 1 - (y_lo - self.low) * scale)
+                    if top == bottom:
+                        painter.drawPoint(column, top)
+                    else:
+                        painter.drawLine(column, top, column, bottom)
+                    previous = (column, lo, hi)
+                    column = None
+                if x is None:
+                    break
+                if column is None:
+                    column, lo, hi = x, bucket_min, bucket_max
+                else:
+                    lo, hi = min(lo, bucket_min), max(hi, bucket_max)
+        painter.end()
+
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        if self._pixmap is not None:
+            painter.drawPixmap(0, 0, self._pixmap)
+        painter.setPen(Qt.black)
+        span = f"{self.span:.0f} s" if self.span < 120 else f"{self.span / 60:.0f} min" if self.span < 7200 else f"{self.span / 3600:.1f} h"
+        painter.drawText(4, 14, span)
+        if self.low is not None:
+            painter.drawText(4, self.height() - 4, f"{self.low:.4g}")
+            painter.drawText(4, 28, f"{self.high:.4g}")
+        x = self.width() - 4
+        for _, name, _, color in reversed(self.series):
+            painter.setPen(color)
+            x -= painter.fontMetrics().horizontalAdvance(name) + 8
+            painter.drawText(x, 14, name)
+        painter.end()